@@ -1,32 +1,68 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import DBAPIError
 import uvicorn
+import time
 from src.routes.user_routes import user_router
-from src.config.database import Base,  sync_engine
+from src.routes.metrics_routes import metrics_router
+from src.routes.health_routes import health_router
+from src.config.database import engine, replica_engine, replica_monitor, warm_up_pool
 from src.config.settings import Settings
-import logging
+from src.config.logging_config import setup_logging, shutdown_logging, start_request_logging
 from contextlib import asynccontextmanager
-from src.utils.init_super_admin import create_super_admin
-from src.config.database import SessionLocal
+from src.utils.bootstrap import run_bootstrap
+from src.utils.lifecycle import request_tracker
+from src.utils.admission import deadline_exceeded, is_statement_timeout
+from src.utils.audit_log import audit_log, client_ip_var
+from src.utils.password_hasher import password_hasher
+from src.utils.session_reaper import session_reaper
+from src.services.session_store import session_store
+from src.services.user_service import detect_trigram_support
+from src.utils.rate_limiter import login_rate_limiter
+from src.utils import metrics
 
 # Configure logging
-logging.basicConfig(
-    filename='app.log',
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging()
 
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    db = SessionLocal()
+    if settings.BOOTSTRAP_ON_STARTUP:
+        await run_bootstrap()
+    # Warm up before the server starts accepting connections
+    await warm_up_pool(settings.WARMUP_DB_CONNECTIONS or settings.DB_POOL_SIZE)
+    if replica_engine is not None:
+        await warm_up_pool(settings.WARMUP_DB_CONNECTIONS or settings.DB_POOL_SIZE, replica_engine)
+        await replica_monitor.check_once()
+        replica_monitor.start()
+    await password_hasher.warm_up()
+    await detect_trigram_support()
+    if settings.SESSION_REAPER_ENABLED and settings.SESSION_STORE == "sql":
+        session_reaper.start()
+    audit_log.start()
+    request_tracker.install_drain_handler(settings.DRAIN_DELAY_SECONDS)
+    request_tracker.draining = False
+    request_tracker.ready = True
     try:
-        create_super_admin(db)
+        yield
     finally:
-        db.close()
-    yield 
+        # Shutdown
+        request_tracker.draining = True
+        await request_tracker.wait_idle(settings.GRACEFUL_SHUTDOWN_SECONDS)
+        await session_reaper.stop()
+        # Write out buffered audit events while the engine is still up
+        await audit_log.close()
+        await replica_monitor.stop()
+        await session_store.close()
+        await login_rate_limiter.backend.close()
+        password_hasher.shutdown()
+        await engine.dispose()
+        if replica_engine is not None:
+            await replica_engine.dispose()
+        shutdown_logging()
 
 
 settings=Settings()
@@ -37,12 +73,9 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API for Sand Project",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan )
 
-# Create tables synchronously
-Base.metadata.create_all(bind=sync_engine)
-
-
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -53,8 +86,45 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    request_id = start_request_logging(request.headers.get("x-request-id"))
+    client_ip_var.set(request.client.host if request.client else None)
+    request_metrics = metrics.RequestMetrics()
+    metrics.current_request.set(request_metrics)
+    start = time.perf_counter()
+    status_code = 500
+    request_tracker.begin()
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        request_tracker.end()
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        metrics.http_request_seconds.observe(
+            time.perf_counter() - start, request.method, route_path, str(status_code)
+        )
+        metrics.db_queries_per_request.observe(request_metrics.db_queries, route_path)
+        metrics.db_seconds_per_request.observe(request_metrics.db_seconds, route_path)
+
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, exc: DBAPIError):
+    # A statement cancelled by the request's deadline is load shedding, not a bug
+    if is_statement_timeout(exc):
+        shed = deadline_exceeded()
+        return ORJSONResponse({"detail": shed.detail}, status_code=shed.status_code, headers=shed.headers)
+    raise exc
+
+
 app.include_router(user_router, prefix="/user", tags=["user"])
+app.include_router(health_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
-# Run app
+# Run app (development; use `python serve.py` in production)
 if __name__ == "__main__":
     uvicorn.run("app:app", host=settings.HOST, port=settings.PORT, reload=True)
\ No newline at end of file
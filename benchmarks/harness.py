@@ -0,0 +1,112 @@
+"""
+Shared plumbing for the benchmarks: environment setup, latency statistics
+and baseline comparison.
+
+The app reads its configuration at import time, so configure_environment()
+must run before anything under src/ or app is imported.
+"""
+import json
+import os
+import statistics
+import tempfile
+from typing import Dict, List, Optional
+
+SUPER_ADMIN_EMAIL = "bench-admin@example.com"
+SUPER_ADMIN_PASSWORD = "bench-admin-password"
+
+
+def configure_environment(db: str) -> str:
+    """
+    Points the app at the benchmark database and quiets background work.
+
+    Args:
+        db: "sqlite" for a throwaway SQLite file, or "postgres" to use the
+            DATABASE_URL / DB_* settings as configured (use a scratch database,
+            the benchmark creates users and sessions).
+    Returns:
+        str: The database URL in use.
+    """
+    if db == "sqlite":
+        path = os.path.join(tempfile.gettempdir(), "fastapi_login_bench.db")
+        if os.path.exists(path):
+            os.remove(path)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.environ["DB_AUTO_CREATE_SCHEMA"] = "true"
+    os.environ.setdefault("ALLOWED_ORIGINS", "http://bench")  # CORSMiddleware needs a value
+    os.environ["SUPER_ADMIN_EMAIL"] = SUPER_ADMIN_EMAIL
+    os.environ["SUPER_ADMIN_PASSWORD"] = SUPER_ADMIN_PASSWORD
+    os.environ["SESSION_REAPER_ENABLED"] = "false"
+    os.environ["LOGIN_RATE_LIMIT_ENABLED"] = "false"  # every benchmark request comes from one IP
+    os.environ["MAX_SESSIONS_PER_USER"] = "0"  # the logout run holds many sessions per user
+    os.environ.setdefault("LOG_FILE", os.path.join(tempfile.gettempdir(), "fastapi_login_bench.log"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    return os.environ.get("DATABASE_URL", "postgresql (DB_* settings)")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float, extra: Optional[dict] = None) -> dict:
+    """Latency percentiles in milliseconds plus throughput."""
+    values = sorted(latencies)
+    result = {
+        "requests": len(values),
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "mean_ms": (statistics.fmean(values) * 1000) if values else 0.0,
+        "throughput_rps": len(values) / elapsed if elapsed > 0 else 0.0,
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+def print_table(title: str, results: Dict[str, dict]) -> None:
+    print(f"\n{title}")
+    print(f"{'case':<34}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'q/req':>8}")
+    for name, r in results.items():
+        queries = r.get("db_queries_per_request")
+        print(
+            f"{name:<34}{r['requests']:>7}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+            f"{r['p99_ms']:>10.2f}{r['throughput_rps']:>10.1f}"
+            f"{(f'{queries:.2f}' if queries is not None else '-'):>8}"
+        )
+
+
+def save_baseline(path: str, results: dict) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\nBaseline written to {path}")
+
+
+def compare_to_baseline(path: str, results: dict, tolerance: float) -> bool:
+    """
+    Compares p95 latency and DB queries per request against a saved run.
+    Returns False if any case regressed by more than tolerance (a fraction).
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+
+    ok = True
+    print(f"\nComparison with {path} (tolerance {tolerance:.0%})")
+    for section, cases in results.items():
+        for name, current in cases.items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                print(f"  {section}/{name}: new case, no baseline")
+                continue
+            for metric in ("p95_ms", "db_queries_per_request"):
+                if metric not in current or metric not in previous:
+                    continue
+                before, after = previous[metric], current[metric]
+                change = (after - before) / before if before else (1.0 if after > before else 0.0)
+                regressed = change > tolerance
+                ok = ok and not regressed
+                marker = "REGRESSION" if regressed else "ok"
+                print(f"  {section}/{name} {metric}: {before:.2f} -> {after:.2f} ({change:+.1%}) {marker}")
+    return ok
@@ -0,0 +1,122 @@
+"""
+End-to-end load against the real FastAPI app, driven in-process through
+httpx's ASGI transport (no network, no uvicorn).
+"""
+import asyncio
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.harness import SUPER_ADMIN_EMAIL, SUPER_ADMIN_PASSWORD, summarize
+
+USER_PASSWORD = "bench-user-password"
+
+
+async def _drive(requests: int, concurrency: int, call: Callable[[int], Awaitable[httpx.Response]]):
+    """Runs `requests` calls with at most `concurrency` in flight, returns latencies."""
+    counter = itertools.count()
+    latencies: List[float] = []
+    failures = 0
+
+    async def worker():
+        nonlocal failures
+        while True:
+            index = next(counter)
+            if index >= requests:
+                return
+            start = time.perf_counter()
+            response = await call(index)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, failures
+
+
+async def _measure(name: str, route: str, requests: int, concurrency: int, call) -> dict:
+    from src.utils import metrics
+
+    count_before, queries_before = metrics.db_queries_per_request.snapshot(route)
+    latencies, elapsed, failures = await _drive(requests, concurrency, call)
+    count_after, queries_after = metrics.db_queries_per_request.snapshot(route)
+    handled = count_after - count_before
+    result = summarize(latencies, elapsed, {
+        "failures": failures,
+        "db_queries_per_request": (queries_after - queries_before) / handled if handled else 0.0,
+    })
+    if failures:
+        print(f"  warning: {name} had {failures} failed requests")
+    return result
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    """Logs in and returns headers carrying the session cookie."""
+    response = await client.post("/user/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    client.cookies.clear()
+    return {"cookie": f"session_id={response.cookies['session_id']}"}
+
+
+async def run_http_benchmarks(requests: int, concurrency: int, users: int) -> Dict[str, dict]:
+    from app import app
+
+    results: Dict[str, dict] = {}
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            admin_cookie = await _login(client, SUPER_ADMIN_EMAIL, SUPER_ADMIN_PASSWORD)
+            run_id = int(time.time())
+
+            def signup(index: int):
+                return client.post(
+                    "/user/signup",
+                    json={
+                        "username": f"bench{index}",
+                        "email": f"bench-{run_id}-{index}@example.com",
+                        "password": USER_PASSWORD,
+                        "role": "admin",
+                    },
+                    headers=admin_cookie,
+                )
+
+            results["signup"] = await _measure("signup", "/user/signup", users, concurrency, signup)
+
+            def login(index: int):
+                return client.post(
+                    "/user/login",
+                    json={"email": f"bench-{run_id}-{index % users}@example.com", "password": USER_PASSWORD},
+                )
+
+            results["login"] = await _measure("login", "/user/login", requests, concurrency, login)
+
+            user_cookies = [
+                await _login(client, f"bench-{run_id}-{i}@example.com", USER_PASSWORD)
+                for i in range(min(users, concurrency))
+            ]
+
+            def me(index: int):
+                return client.get("/user/me", headers=user_cookies[index % len(user_cookies)])
+
+            results["me"] = await _measure("me", "/user/me", requests, concurrency, me)
+
+            def list_users(index: int):
+                return client.get("/user/users", params={"limit": 100}, headers=admin_cookie)
+
+            results["users"] = await _measure("users", "/user/users", requests, concurrency, list_users)
+
+            logout_cookies = [
+                await _login(client, f"bench-{run_id}-{i % users}@example.com", USER_PASSWORD)
+                for i in range(requests)
+            ]
+
+            def logout(index: int):
+                return client.post("/user/logout", headers=logout_cookies[index])
+
+            results["logout"] = await _measure("logout", "/user/logout", requests, concurrency, logout)
+
+    return results
@@ -0,0 +1,112 @@
+"""
+Micro-benchmarks for the auth hot path pieces in isolation:
+session validation (cache hit and store lookup), the require_roles and
+require_permissions checks, response serialization (the old
+jsonable_encoder path against response models + orjson) and password
+hashing/verification.
+"""
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict
+
+from benchmarks.harness import SUPER_ADMIN_EMAIL, SUPER_ADMIN_PASSWORD, summarize
+
+
+async def _time_loop(iterations: int, call: Callable[[], Awaitable]) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def run_micro_benchmarks(iterations: int, hash_iterations: int) -> Dict[str, dict]:
+    from sqlalchemy import select
+
+    from app import app
+    from src.config.database import AsyncSessionLocal
+    from src.dependencies.auth_dependencies import require_permissions, require_roles
+    from src.models.user import User
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import ORJSONResponse
+
+    from src.schemas.user_schema import Permission, UserResponse, UserRole
+    from src.services.user_service import UserService, build_user_list_query
+    from src.utils.password_hasher import password_hasher, pwd_context
+    from src.utils.session_cache import session_cache
+
+    results: Dict[str, dict] = {}
+
+    async with app.router.lifespan_context(app):
+        async with AsyncSessionLocal() as db:
+            service = UserService(db)
+            admin = (await db.execute(select(User).where(User.email == SUPER_ADMIN_EMAIL))).scalar_one()
+            principal = await service.create_session(admin)
+            session_id = principal.session_id
+
+            await service.validate_session(session_id)
+            results["validate_session[cache]"] = await _time_loop(
+                iterations, lambda: service.validate_session(session_id)
+            )
+
+            async def uncached():
+                session_cache.invalidate(session_id)
+                return await service.validate_session(session_id)
+
+            results["validate_session[store]"] = await _time_loop(iterations, uncached)
+
+        checker = require_roles([UserRole.superadmin, UserRole.admin])
+        results["require_roles"] = await _time_loop(iterations, lambda: checker(principal))
+        permission_checker = require_permissions(Permission.list_users, Permission.read_users)
+        results["require_permissions"] = await _time_loop(iterations, lambda: permission_checker(principal))
+
+        # Per-response serialization cost, before (jsonable_encoder walking
+        # the ORM object) and after (response model + orjson)
+        async def encode_legacy():
+            json.dumps(jsonable_encoder({"data": admin})).encode()
+
+        async def encode_model():
+            ORJSONResponse(UserResponse.model_validate({"data": admin}, from_attributes=True).model_dump(mode="json"))
+
+        results["serialize user[jsonable_encoder]"] = await _time_loop(iterations, encode_legacy)
+        results["serialize user[model+orjson]"] = await _time_loop(iterations, encode_model)
+
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(build_user_list_query(limit=1000))).mappings().all()
+            page = {"data": [dict(row) for row in rows], "next_cursor": None}
+
+        async def encode_page_legacy():
+            json.dumps(jsonable_encoder(page)).encode()
+
+        async def encode_page_orjson():
+            ORJSONResponse(page)
+
+        list_iterations = max(1, iterations // 10)
+        results["serialize list[jsonable_encoder]"] = await _time_loop(list_iterations, encode_page_legacy)
+        results["serialize list[orjson]"] = await _time_loop(list_iterations, encode_page_orjson)
+
+        hashed = pwd_context.hash(SUPER_ADMIN_PASSWORD)
+
+        async def direct_verify():
+            pwd_context.verify(SUPER_ADMIN_PASSWORD, hashed)
+
+        results["verify[inline]"] = await _time_loop(hash_iterations, direct_verify)
+        results["verify[pool]"] = await _time_loop(
+            hash_iterations, lambda: password_hasher.verify(SUPER_ADMIN_PASSWORD, hashed)
+        )
+        results["hash[pool]"] = await _time_loop(
+            hash_iterations, lambda: password_hasher.hash(SUPER_ADMIN_PASSWORD)
+        )
+
+        # Concurrent verifies: throughput of the pool versus blocking the loop
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            password_hasher.verify(SUPER_ADMIN_PASSWORD, hashed) for _ in range(hash_iterations)
+        ))
+        elapsed = time.perf_counter() - start
+        results["verify[pool x concurrent]"] = summarize([elapsed / hash_iterations] * hash_iterations, elapsed)
+
+    return results
@@ -0,0 +1,69 @@
+"""
+Auth hot path benchmark suite.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.run --db sqlite --concurrency 16 --requests 500
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+    python -m benchmarks.run --smoke
+
+--db sqlite runs against a throwaway SQLite file; --db postgres uses the
+DATABASE_URL / DB_* settings (point them at a scratch database). Note that a
+.env file in the working directory overrides the environment.
+
+With --baseline the run exits non-zero when p95 latency or DB queries per
+request regress by more than --tolerance. --smoke is a few seconds' run with
+tiny counts that exits non-zero if any request fails; run it after changes
+to the auth paths to keep the suite itself working.
+"""
+import argparse
+import asyncio
+import sys
+
+from benchmarks.harness import compare_to_baseline, configure_environment, print_table, save_baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auth hot path benchmarks")
+    parser.add_argument("--db", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=50, help="users created via /user/signup")
+    parser.add_argument("--iterations", type=int, default=2000, help="micro-benchmark iterations")
+    parser.add_argument("--hash-iterations", type=int, default=20)
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved run")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--smoke", action="store_true", help="tiny run that fails on any failed request")
+    args = parser.parse_args()
+    if args.smoke:
+        args.requests, args.concurrency, args.users = 5, 2, 2
+        args.iterations, args.hash_iterations = 10, 2
+
+    db_url = configure_environment(args.db)
+    print(f"Database: {db_url}")
+
+    from benchmarks.http_bench import run_http_benchmarks
+    from benchmarks.micro_bench import run_micro_benchmarks
+
+    results = {}
+    if not args.skip_http:
+        results["http"] = asyncio.run(run_http_benchmarks(args.requests, args.concurrency, args.users))
+        print_table(f"HTTP endpoints (concurrency {args.concurrency})", results["http"])
+    if not args.skip_micro:
+        results["micro"] = asyncio.run(run_micro_benchmarks(args.iterations, args.hash_iterations))
+        print_table("Micro-benchmarks", results["micro"])
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+    if args.baseline and not compare_to_baseline(args.baseline, results, args.tolerance):
+        sys.exit(1)
+    if args.smoke and any(r.get("failures") for r in results.get("http", {}).values()):
+        print("\nSmoke run failed: some requests returned errors")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Worker cold-start benchmark.
+
+Spawns fresh interpreters that import `app` and run its lifespan startup,
+which is what every uvicorn worker (and every --reload) pays before it can
+serve traffic. Run it on two checkouts to compare them:
+
+    python -m benchmarks.startup_bench --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+
+async def startup():
+    async with app_module.app.router.lifespan_context(app_module.app):
+        t2 = time.perf_counter()
+    return t2
+
+t2 = asyncio.run(startup())
+print(json.dumps({"import": t1 - t0, "startup": t2 - t1, "total": t2 - t0}))
+"""
+
+
+def run_once() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [run_once() for _ in range(args.runs)]
+    for phase in ("import", "startup", "total"):
+        values = [sample[phase] * 1000 for sample in samples]
+        print(
+            f"{phase:>8}: median {statistics.median(values):8.1f} ms"
+            f"  min {min(values):8.1f} ms  max {max(values):8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Production entry point.
+
+    python serve.py
+
+Runs the schema/super admin bootstrap once, then WEB_WORKERS uvicorn worker
+processes (one per CPU by default). Each worker warms its DB pool and
+hashing pool before it accepts connections. On SIGTERM a worker reports
+itself as draining on /health/ready, stops accepting after
+DRAIN_DELAY_SECONDS and gives in-flight requests up to
+GRACEFUL_SHUTDOWN_SECONDS to finish.
+
+Per-process session state (SESSION_STORE=memory, or token revocations kept
+in memory) is refused with more than one worker: a logout or password
+change would only take effect on the worker that handled it.
+"""
+import asyncio
+import os
+
+import uvicorn
+
+from src.config.settings import Settings
+from src.utils.bootstrap import main as bootstrap
+
+settings = Settings()
+
+
+def worker_count(configured: int = settings.WEB_WORKERS) -> int:
+    return configured if configured > 0 else (os.cpu_count() or 1)
+
+
+def check_worker_safety(workers: int) -> None:
+    """Refuses settings whose session state would diverge between workers."""
+    if workers <= 1:
+        return
+    if settings.SESSION_STORE == "memory":
+        reason = "SESSION_STORE=memory keeps sessions in each worker, so a login only works on one of them"
+        fix = "use SESSION_STORE=sql or kv"
+    elif settings.SESSION_STORE == "token" and settings.SESSION_TOKEN_REVOCATION != "kv":
+        reason = "SESSION_TOKEN_REVOCATION=memory keeps revocations in each worker, so revoked tokens still work on the others"
+        fix = "set SESSION_TOKEN_REVOCATION=kv (with SESSION_KV_URL)"
+    else:
+        return
+    raise SystemExit(f"{reason}; {fix}, or run with WEB_WORKERS=1.")
+
+
+def main():
+    workers = worker_count()
+    check_worker_safety(workers)
+    asyncio.run(bootstrap())
+    # Spawned workers read the environment when they import the app; a
+    # single worker runs in this process and sees the class attribute.
+    os.environ["BOOTSTRAP_ON_STARTUP"] = "false"
+    Settings.BOOTSTRAP_ON_STARTUP = False
+
+    uvicorn.run(
+        "app:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        timeout_graceful_shutdown=int(settings.GRACEFUL_SHUTDOWN_SECONDS),
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
 
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.config.settings import Settings
+from src.utils.metrics import db_session_seconds, install_query_metrics, record_pool_wait
+from src.utils.replica_monitor import ReplicaMonitor
 # Load environment variables from .env file
 load_dotenv(override=True)
 
+settings = Settings()
+
 # Get individual components from environment variables
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
@@ -16,31 +25,191 @@ DB_PORT = os.getenv("DB_PORT", "5432")  # Default to 5432 if not provided
 DB_NAME = os.getenv("DB_NAME")
 
 
-# Construct database URLs dynamically
-DATABASE_URL_ASYNC = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-DATABASE_URL_SYNC = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Construct database URL dynamically (DATABASE_URL overrides it, e.g. sqlite+aiosqlite for benchmarks)
+DATABASE_URL_ASYNC = os.getenv("DATABASE_URL") or f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+
+class _WaitTimingMixin:
+    """Records how long checkouts wait for a pooled connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            record_pool_wait(waited)
+            self.wait_count += 1
+            self.wait_seconds += waited
+            if waited > self.max_wait_seconds:
+                self.max_wait_seconds = waited
+
+
+class TimedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def create_db_engine(url: str = DATABASE_URL_ASYNC, settings: Settings = settings) -> AsyncEngine:
+    """
+    Creates the async engine from Settings.
+    Args:
+        url: Database URL (asyncpg).
+        settings: Pool size, overflow, timeouts, pre-ping, statement cache and echo.
+    Returns:
+        AsyncEngine: Engine backed by a TimedAsyncQueuePool.
+    """
+    db_url = make_url(url)
+    if db_url.get_backend_name() == "postgresql" and db_url.get_driver_name() == "asyncpg":
+        db_url = db_url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+        )
+    return create_async_engine(
+        db_url,
+        poolclass=TimedAsyncQueuePool,
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+async def warm_up_pool(connections: int, db_engine=None) -> None:
+    """
+    Opens connections up front so the first requests don't pay for connects.
+    Args:
+        connections: How many to open concurrently (returned to the pool after).
+        db_engine: Engine to warm, defaults to the main async engine.
+    """
+    db_engine = db_engine if db_engine is not None else engine
+
+    async def one():
+        async with db_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(one() for _ in range(connections)))
+
+
+def get_pool_stats(db_engine=None) -> dict:
+    """
+    Live connection pool statistics.
+    Args:
+        db_engine: Engine to inspect, defaults to the main async engine.
+    Returns:
+        dict: Pool size, checked in/out connections, overflow and checkout wait time.
+    """
+    pool = (db_engine if db_engine is not None else engine).pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "wait_count": getattr(pool, "wait_count", 0),
+        "wait_seconds_total": getattr(pool, "wait_seconds", 0.0),
+        "wait_seconds_max": getattr(pool, "max_wait_seconds", 0.0),
+    }
 
 
 # Create an asynchronous engine and session factory
-engine = create_async_engine(DATABASE_URL_ASYNC, echo=True, future=True)
+engine = create_db_engine()
+install_query_metrics(engine)
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+# Optional read replica
+replica_engine = create_db_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+if replica_engine is not None:
+    install_query_metrics(replica_engine)
+replica_monitor = ReplicaMonitor(replica_engine, settings.REPLICA_MAX_LAG_SECONDS, settings.REPLICA_LAG_CHECK_SECONDS)
+
+
+class ReplicaRoutingSession(Session):
+    """
+    Sends plain SELECTs to the replica while it is usable, everything else
+    (flushes, DML, SELECT ... FOR UPDATE, raw SQL) to the primary.
+    Once the session writes, or is pinned, every later statement goes to
+    the primary too, so a request always reads its own writes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pinned_to_primary = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.pinned_to_primary or replica_engine is None:
+            return engine.sync_engine
+        if self._flushing or (clause is not None and (
+            not getattr(clause, "is_select", False) or getattr(clause, "_for_update_arg", None) is not None
+        )):
+            self.pinned_to_primary = True
+            return engine.sync_engine
+        if not replica_monitor.usable:
+            return engine.sync_engine
+        return replica_engine.sync_engine
+
+
+ReadSessionLocal = sessionmaker(
+    bind=engine, class_=AsyncSession, sync_session_class=ReplicaRoutingSession, expire_on_commit=False
+)
+
 
-# Create a synchronous engine and session factory
-sync_engine = create_engine(DATABASE_URL_SYNC, echo=True)
-SessionLocal = sessionmaker(bind=sync_engine, class_=Session, expire_on_commit=False)
+def may_read_replica(db: AsyncSession) -> bool:
+    """True if the session's next SELECT could be served by the replica."""
+    sync_session = db.sync_session
+    return (
+        replica_engine is not None
+        and isinstance(sync_session, ReplicaRoutingSession)
+        and not sync_session.pinned_to_primary
+    )
 
 
 # Declare the base class for ORM models
 Base = declarative_base()
 
 
+def insert(table):
+    """INSERT construct with on_conflict_do_nothing() support for the engine's dialect."""
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
 async def get_db():
     """
     Provides an async database session.
     Yields:
         AsyncSession: An asynchronous SQLAlchemy database session.
     """
-    async with AsyncSessionLocal() as db:
-        yield db
+    start = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            yield db
+    finally:
+        db_session_seconds.observe(time.perf_counter() - start)
+
+
+
+async def get_read_db():
+    """
+    Provides an async session whose reads may be served by the replica.
+    Yields:
+        AsyncSession: A session routed by ReplicaRoutingSession.
+    """
+    start = time.perf_counter()
+    try:
+        async with ReadSessionLocal() as db:
+            yield db
+    finally:
+        db_session_seconds.observe(time.perf_counter() - start)
+
 
+if replica_engine is None:
+    # Without a replica, share get_db's per-request session rather than
+    # opening a second one when a route depends on both.
+    get_read_db = get_db  # noqa: F811
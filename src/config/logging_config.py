@@ -0,0 +1,151 @@
+import json
+import logging
+import queue
+import random
+import re
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from src.config.settings import Settings
+
+settings = Settings()
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+debug_sampled_var: ContextVar[bool] = ContextVar("debug_sampled", default=True)
+
+# key=value / "key": "value" pairs whose value must never reach the log file
+_SECRET_PATTERN = re.compile(
+    r"""(?P<key>password(?:_hash)?|old_password|new_password|session_id|secret|token)"""
+    r"""(?P<sep>['"]?\s*[:=]\s*)(?P<value>"[^"]*"|'[^']*'|[^'",\s)}]+)""",
+    re.IGNORECASE,
+)
+
+# extra= field names whose whole value is masked
+_SECRET_KEY = re.compile(r"password|session_id|secret|token", re.IGNORECASE)
+
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def redact(text: str) -> str:
+    def mask(match: re.Match) -> str:
+        value = match["value"]
+        quote = value[0] if value[0] in "'\"" else ""
+        return f"{match['key']}{match['sep']}{quote}***{quote}"
+
+    return _SECRET_PATTERN.sub(mask, text)
+
+
+class RedactingFilter(logging.Filter):
+    """Masks passwords, hashes, session IDs and tokens in the final message."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage())
+        record.args = None
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps DEBUG records only for requests picked by the per-request sample."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or debug_sampled_var.get()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key in _RECORD_FIELDS or key == "request_id":
+                continue
+            # extra= fields bypass RedactingFilter, which only sees the message
+            if _SECRET_KEY.search(key):
+                entry[key] = "***"
+            elif value is None or isinstance(value, (bool, int, float)):
+                entry[key] = value
+            else:
+                entry[key] = redact(value if isinstance(value, str) else str(value))
+        if record.exc_info:
+            entry["exc"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+    When the listener falls behind and the queue is full, records are
+    dropped and counted instead.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        return super().prepare(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+queue_handler: Optional[DroppingQueueHandler] = None
+
+
+def setup_logging() -> None:
+    """
+    Routes all logging through a bounded queue to a background thread that
+    writes redacted JSON lines to a size-rotated file.
+    """
+    global _listener, queue_handler
+    if _listener is not None:
+        return
+
+    file_handler = RotatingFileHandler(
+        settings.LOG_FILE,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(JsonFormatter())
+    file_handler.addFilter(RedactingFilter())
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(DebugSamplingFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    _listener = QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def start_request_logging(request_id: Optional[str] = None) -> str:
+    """Tags log records with a request id and rolls the DEBUG sample for this request."""
+    request_id = request_id or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    debug_sampled_var.set(random.random() < settings.LOG_DEBUG_SAMPLE_RATE)
+    return request_id
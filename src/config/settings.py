@@ -14,8 +14,8 @@ class Settings:
 
     #server config
     PROJECT_NAME = "Sand Project"
-    PORT= 8000
-    HOST = "0.0.0.0"
+    PORT= int(os.getenv("PORT", "8000"))
+    HOST = os.getenv("HOST", "0.0.0.0")
     DEBUG = False
 
     
@@ -26,4 +26,151 @@ class Settings:
     COOKIE_DOMAIN = os.getenv("COOKIE_DOMAIN")
     
     ENV = os.getenv("ENV")
+
+
+    # Session cache (per worker)
+    SESSION_CACHE_MAX_SIZE = int(os.getenv("SESSION_CACHE_MAX_SIZE", "10000"))
+    SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "60"))
     
+
+
+    # Password hashing: scheme ("bcrypt", "argon2" or "scrypt") and cost.
+    # Use `python -m src.utils.password_hasher calibrate --target-ms 250` to pick the cost.
+    PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST_KIB = int(os.getenv("ARGON2_MEMORY_COST_KIB", "65536"))
+    ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "2"))
+    SCRYPT_LOG2_N = int(os.getenv("SCRYPT_LOG2_N", "16"))
+    SCRYPT_BLOCK_SIZE = int(os.getenv("SCRYPT_BLOCK_SIZE", "8"))
+    SCRYPT_PARALLELISM = int(os.getenv("SCRYPT_PARALLELISM", "1"))
+    SCRYPT_MAX_MEMORY_MB = int(os.getenv("SCRYPT_MAX_MEMORY_MB", "128"))
+
+    # Password hashing pool ("thread" or "process")
+    PASSWORD_HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+
+    # Database engine / connection pool
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+    # Run create_all on startup (dev only; use `python -m src.utils.migrate` otherwise)
+    DB_AUTO_CREATE_SCHEMA = os.getenv("DB_AUTO_CREATE_SCHEMA", "false").lower() == "true"
+
+
+    # Bulk user import
+    BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "10000"))
+
+
+    # Expired session reaper
+    SESSION_REAPER_ENABLED = os.getenv("SESSION_REAPER_ENABLED", "true").lower() == "true"
+    SESSION_REAPER_INTERVAL_SECONDS = float(os.getenv("SESSION_REAPER_INTERVAL_SECONDS", "300"))
+    SESSION_REAPER_BATCH_SIZE = int(os.getenv("SESSION_REAPER_BATCH_SIZE", "1000"))
+    SESSION_REAPER_MAX_BATCHES = int(os.getenv("SESSION_REAPER_MAX_BATCHES", "100"))
+    # Create sessions as a monthly partitioned table (applied by src.utils.migrate)
+    SESSION_PARTITIONING = os.getenv("SESSION_PARTITIONING", "false").lower() == "true"
+
+
+    # Session store backend: "sql" (sessions table), "memory" (per worker), "kv" (Redis protocol)
+    # or "token" (stateless signed cookies, no store lookup)
+    SESSION_STORE = os.getenv("SESSION_STORE", "sql")
+    SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+    # Sliding idle timeout for the memory and kv stores (0 disables it)
+    SESSION_IDLE_TIMEOUT_SECONDS = int(os.getenv("SESSION_IDLE_TIMEOUT_SECONDS", "0"))
+    SESSION_STORE_SHARDS = int(os.getenv("SESSION_STORE_SHARDS", "16"))
+    SESSION_KV_URL = os.getenv("SESSION_KV_URL", "redis://127.0.0.1:6379/0")
+    SESSION_KV_POOL_SIZE = int(os.getenv("SESSION_KV_POOL_SIZE", "10"))
+    # Token mode: "kid:secret,..." - the first key signs, every key verifies
+    SESSION_TOKEN_KEYS = os.getenv("SESSION_TOKEN_KEYS")
+    # Token revocation list: "memory" (per worker; serve.py refuses it with
+    # several workers) or "kv" (shared, uses SESSION_KV_URL)
+    SESSION_TOKEN_REVOCATION = os.getenv("SESSION_TOKEN_REVOCATION", "memory")
+    # Concurrent sessions per user; logging in past the cap ends the oldest
+    # ones (0 = unlimited; not enforced by the stateless token store)
+    MAX_SESSIONS_PER_USER = int(os.getenv("MAX_SESSIONS_PER_USER", "10"))
+    # sql store only: batch concurrent session inserts into one commit,
+    # flushed after at most WINDOW_MS or MAX_BATCH sessions
+    SESSION_GROUP_COMMIT = os.getenv("SESSION_GROUP_COMMIT", "false").lower() == "true"
+    SESSION_GROUP_COMMIT_WINDOW_MS = float(os.getenv("SESSION_GROUP_COMMIT_WINDOW_MS", "2"))
+    SESSION_GROUP_COMMIT_MAX_BATCH = int(os.getenv("SESSION_GROUP_COMMIT_MAX_BATCH", "500"))
+
+    # User search: per-worker cache of recent results (0 disables)
+    USER_SEARCH_CACHE_SIZE = int(os.getenv("USER_SEARCH_CACHE_SIZE", "1024"))
+    USER_SEARCH_CACHE_TTL_SECONDS = float(os.getenv("USER_SEARCH_CACHE_TTL_SECONDS", "30"))
+
+    # Audit log of logins, logouts, signups and password changes, buffered
+    # in memory and written in batches by a background task
+    AUDIT_LOG_ENABLED = os.getenv("AUDIT_LOG_ENABLED", "true").lower() == "true"
+    AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "1000"))
+    AUDIT_FLUSH_INTERVAL_MS = float(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "1000"))
+    # When the buffer is full: drop_newest, drop_oldest or block (then drop after the timeout)
+    AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "drop_newest")
+    AUDIT_BLOCK_TIMEOUT_MS = float(os.getenv("AUDIT_BLOCK_TIMEOUT_MS", "100"))
+    # Postgres: write batches with COPY rather than a multi-row INSERT
+    AUDIT_USE_COPY = os.getenv("AUDIT_USE_COPY", "true").lower() == "true"
+
+
+    # Logging (JSON lines written by a background thread)
+    LOG_FILE = os.getenv("LOG_FILE", "app.log")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Share of requests whose DEBUG records are kept (when LOG_LEVEL=DEBUG)
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+
+
+    # Expose /metrics (Prometheus text format)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+
+    # Login rate limiting (attempts per window; 0 disables a limit).
+    # Backend "memory" (per worker) or "kv" (shared, uses SESSION_KV_URL)
+    LOGIN_RATE_LIMIT_ENABLED = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    LOGIN_RATE_LIMIT_BACKEND = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory")
+    LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "30"))
+    LOGIN_RATE_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", "5"))
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("LOGIN_RATE_LIMIT_WINDOW_SECONDS", "60"))
+    LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+    # Production server (python serve.py); WEB_WORKERS=0 runs one worker per CPU
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", "0"))
+    # How long a SIGTERM'd worker waits for in-flight requests to finish
+    GRACEFUL_SHUTDOWN_SECONDS = float(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30"))
+    # How long /health/ready reports 503 before the worker stops accepting
+    DRAIN_DELAY_SECONDS = float(os.getenv("DRAIN_DELAY_SECONDS", "0"))
+    # DB connections each worker opens before taking traffic (0 = DB_POOL_SIZE)
+    WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "0"))
+    # Run schema creation/super admin bootstrap in the app lifespan. serve.py
+    # runs it once itself and switches this off for its workers.
+    BOOTSTRAP_ON_STARTUP = os.getenv("BOOTSTRAP_ON_STARTUP", "true").lower() == "true"
+
+
+    # Read replica (full async URL). Read-only routes and the auth lookup use
+    # it while its lag is within REPLICA_MAX_LAG_SECONDS; unset = primary only.
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "1"))
+
+
+    # Admission control: concurrent requests and queue length per route class
+    # (login, read = authenticated reads, write = admin writes). Past the
+    # queue, or past the deadline while queued, requests get a 503.
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_LOGIN_LIMIT = int(os.getenv("ADMISSION_LOGIN_LIMIT", "32"))
+    ADMISSION_LOGIN_QUEUE = int(os.getenv("ADMISSION_LOGIN_QUEUE", "64"))
+    ADMISSION_READ_LIMIT = int(os.getenv("ADMISSION_READ_LIMIT", "64"))
+    ADMISSION_READ_QUEUE = int(os.getenv("ADMISSION_READ_QUEUE", "256"))
+    ADMISSION_WRITE_LIMIT = int(os.getenv("ADMISSION_WRITE_LIMIT", "8"))
+    ADMISSION_WRITE_QUEUE = int(os.getenv("ADMISSION_WRITE_QUEUE", "32"))
+    # Time budget per request, queueing included; also the DB statement_timeout
+    REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "5"))
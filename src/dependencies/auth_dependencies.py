@@ -2,24 +2,24 @@
 from typing import List, Union, Callable
 from fastapi import Cookie, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.config.database import get_db
+from src.config.database import get_read_db
 from src.services.user_service import UserService
-from src.models.user import User
-from src.schemas.user_schema import UserRole  
+from src.schemas.user_schema import AuthPrincipal, Permission, ROLE_BITS, UserRole
+from src.utils.audit_log import actor_var
 
-async def get_current_user(session_id: str = Cookie(None), db: AsyncSession = Depends(get_db)):
+async def get_current_user(session_id: str = Cookie(None), db: AsyncSession = Depends(get_read_db)) -> AuthPrincipal:
     """Dependency to get current authenticated user."""
     if not session_id:
         raise HTTPException(status_code=401, detail="Missing session ID")
     
     user_service = UserService(db)
     try:
-        _, user = await user_service.validate_session(session_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
+        principal = await user_service.validate_session(session_id)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid session")
+    # Audit events of this request are attributed to the caller
+    actor_var.set(principal.email)
+    return principal
 
 
 
@@ -33,34 +33,45 @@ def require_roles(allowed_roles: Union[UserRole, List[UserRole]]) -> Callable:
     Returns:
         FastAPI dependency function
     """
-    # Normalize to list
+    # Compile to a bitmask once, when the route is declared
     if isinstance(allowed_roles, UserRole):
         allowed_roles = [allowed_roles]
+    allowed_mask = 0
+    for role in allowed_roles:
+        allowed_mask |= ROLE_BITS[role]
+    # Only the message is precomputed: a shared exception instance would grow
+    # its __traceback__ (and keep every denied request's frames) on each raise
+    denied_detail = f"Access denied. Required roles: {', '.join(role.value for role in allowed_roles)}"
     
-    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: AuthPrincipal = Depends(get_current_user)) -> AuthPrincipal:
         """Check if current user has required role(s)"""
-        if not current_user.role:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="User has no assigned role"
-            )
-        
-        # Convert string role to enum for comparison
-        try:
-            user_role = UserRole(current_user.role)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Invalid user role"
-            )
-        
-        if user_role not in allowed_roles:
-            role_names = [role.value for role in allowed_roles]
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Access denied. Required roles: {', '.join(role_names)}"
-            )
-        
+        if not current_user.role_bit & allowed_mask:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=denied_detail)
         return current_user
     
     return role_checker
+
+
+
+def require_permissions(*permissions: Permission) -> Callable:
+    """
+    Create a dependency that requires every one of the given permissions.
+
+    Args:
+        permissions: Permission flags the route needs
+
+    Returns:
+        FastAPI dependency function
+    """
+    required = 0
+    for permission in permissions:
+        required |= int(permission)
+    denied_detail = f"Access denied. Required permissions: {', '.join(p.name for p in permissions)}"
+
+    async def permission_checker(current_user: AuthPrincipal = Depends(get_current_user)) -> AuthPrincipal:
+        """Check the principal's precompiled permission mask"""
+        if current_user.permissions & required != required:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=denied_detail)
+        return current_user
+
+    return permission_checker
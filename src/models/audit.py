@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+
+from src.config.database import Base
+
+
+class AuditEvent(Base):
+    """
+    Append-only record of authentication events.
+
+    user_mail is deliberately not a foreign key: the trail must outlive the
+    user, and writes are batched so they cannot be tied to the user's row.
+    """
+    __tablename__ = "audit_events"
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    event = Column(String(32), nullable=False)
+    user_mail = Column(String(100))
+    # Who did it, when not the user themselves (admin password reset, signup)
+    actor_mail = Column(String(100))
+    # First 16 hex digits of sha256(session_id), as in the session listing
+    session_ref = Column(String(16))
+    client_ip = Column(String(45))
+    request_id = Column(String(64))
+
+    __table_args__ = (
+        Index("ix_audit_events_user_mail_occurred_at", "user_mail", "occurred_at"),
+        Index("ix_audit_events_occurred_at", "occurred_at"),
+    )
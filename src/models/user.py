@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta,timezone
 from sqlalchemy import Enum as SqlEnum
 from src.config.database import Base
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from src.schemas.user_schema import UserRole
@@ -15,7 +15,12 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     role = Column(SqlEnum(UserRole, name="userrole", create_type=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped by the ORM on every UPDATE; the source of the user's ETag.
+    version = Column(Integer, nullable=False, server_default="1")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     sessions =relationship("Session", back_populates="user", cascade="all, delete-orphan")
+
+    __mapper_args__ = {"version_id_col": version, "eager_defaults": True}
     
 
 
@@ -26,5 +31,8 @@ class Session(Base):
     user_mail = Column(String(100),ForeignKey('users.email', ondelete='CASCADE'), nullable=False)
     session_id = Column(String(100), unique=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    expires_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), index=True)
     user = relationship("User", back_populates="sessions")
+
+    # Per-user lookups (revoke all, session cap) walk only that user's rows, oldest first
+    __table_args__ = (Index("ix_sessions_user_mail_created_at", "user_mail", "created_at"),)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from src.utils.lifecycle import request_tracker
+
+
+health_router = APIRouter()
+
+
+@health_router.get("/health/live", include_in_schema=False)
+async def live():
+    """The worker process is up and serving."""
+    return {"status": "ok"}
+
+
+@health_router.get("/health/ready", include_in_schema=False)
+async def ready():
+    """Warmed up and not draining; load balancers should route here only on 200."""
+    if request_tracker.ready and not request_tracker.draining:
+        return {"status": "ready", "in_flight": request_tracker.in_flight}
+    status = "draining" if request_tracker.draining else "starting"
+    return ORJSONResponse({"status": status, "in_flight": request_tracker.in_flight}, status_code=503)
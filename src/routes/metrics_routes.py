@@ -0,0 +1,94 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.config import logging_config
+from src.config.database import get_pool_stats, replica_engine, replica_monitor
+from src.utils.metrics import registry
+from src.utils.admission import limiters
+from src.utils.audit_log import audit_log
+from src.utils.lifecycle import request_tracker
+from src.utils.password_hasher import password_hasher
+from src.utils.rate_limiter import login_rate_limiter
+from src.utils.session_cache import session_cache
+from src.utils.search_cache import search_cache
+from src.utils.session_reaper import session_reaper
+from src.services.session_store import GroupCommitSqlSessionStore, session_store
+
+
+metrics_router = APIRouter()
+
+
+def _stats_gauge(name: str, documentation: str, stats, keys):
+    """Exposes selected keys of a component's stats() dict as one labelled gauge."""
+    registry.gauge(
+        name,
+        documentation,
+        lambda: [((key,), stats()[key]) for key in keys],
+        labels=("stat",),
+    )
+
+
+_stats_gauge(
+    "db_pool", "Connection pool state",
+    get_pool_stats, ("size", "checked_in", "checked_out", "overflow", "wait_count", "wait_seconds_total", "wait_seconds_max"),
+)
+_stats_gauge(
+    "session_cache", "Session cache size and hit/miss/eviction counts",
+    session_cache.stats, ("size", "max_size", "hits", "misses", "evictions"),
+)
+_stats_gauge(
+    "audit_log", "Audit events buffered, written and dropped",
+    audit_log.stats, ("buffered", "recorded", "written", "dropped", "failed", "batches", "flush_seconds_total"),
+)
+_stats_gauge(
+    "user_search_cache", "User search cache size and hit/miss/eviction counts",
+    search_cache.stats, ("size", "max_size", "hits", "misses", "evictions"),
+)
+_stats_gauge(
+    "password_hasher", "Hashing pool load and totals",
+    password_hasher.stats, ("in_flight", "completed", "rejected", "hash_seconds_total", "queue_wait_seconds_total"),
+)
+_stats_gauge(
+    "session_reaper", "Expired session reaper totals",
+    session_reaper.stats, ("runs", "rows_reaped_total", "partitions_dropped_total", "last_run_rows", "last_run_seconds"),
+)
+if replica_engine is not None:
+    _stats_gauge(
+        "db_replica_pool", "Replica connection pool state",
+        lambda: get_pool_stats(replica_engine), ("size", "checked_in", "checked_out", "overflow", "wait_count"),
+    )
+    _stats_gauge(
+        "db_replica", "Replica lag and whether reads are routed to it",
+        replica_monitor.stats, ("usable", "lag_seconds", "checks", "failures"),
+    )
+_stats_gauge(
+    "http_requests", "In-flight requests and readiness of this worker",
+    request_tracker.stats, ("in_flight", "completed", "ready", "draining"),
+)
+if isinstance(session_store, GroupCommitSqlSessionStore):
+    _stats_gauge(
+        "session_group_commit", "Batched session inserts",
+        session_store.committer.stats, ("batches", "items", "largest_batch", "pending", "flush_seconds_total", "failures"),
+    )
+registry.gauge(
+    "admission", "Active and queued requests per route class",
+    lambda: [
+        ((route_class, key), value)
+        for route_class, limiter in limiters.items()
+        for key, value in limiter.stats().items()
+    ],
+    labels=("route_class", "stat"),
+)
+registry.gauge(
+    "login_rate_limited", "Login attempts rejected by the rate limiter",
+    lambda: [((), login_rate_limiter.rejected)],
+)
+registry.gauge(
+    "log_records_dropped", "Log records dropped because the log queue was full",
+    lambda: [((), logging_config.queue_handler.dropped if logging_config.queue_handler else 0)],
+)
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics_route():
+    """Prometheus text exposition of the worker's metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
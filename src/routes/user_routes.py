@@ -1,13 +1,25 @@
+import csv
+import io
+from datetime import datetime
+from typing import Optional
 from fastapi import HTTPException,status
-from fastapi import APIRouter, Depends, Response, Cookie
+from fastapi import APIRouter, Depends, Header, Request, Response, Cookie, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.config.database import get_db
-from src.dependencies.auth_dependencies import require_roles
-from src.models.user import User
-from src.schemas.user_schema import UserCreate, UserRole, Userlogin, UserUpdate, PasswordChange, AdminPasswordChange
-from src.services.user_service import UserService
+from src.config.database import get_db, get_read_db
+from src.dependencies.auth_dependencies import require_permissions
+from src.schemas.user_schema import (
+    AuthPrincipal, Permission, UserCreate, UserRole, Userlogin, UserUpdate, PasswordChange, AdminPasswordChange,
+    CurrentUserResponse, LoginResponse, MessageResponse, UserListResponse, UserMutationResponse, UserResponse,
+    RevokedSessionsResponse, SessionListResponse,
+)
+from src.services.user_service import UserService, USER_LIST_FIELDS
 from src.config.settings import Settings
+from src.utils.rate_limiter import login_rate_limiter
+from src.utils.admission import admission, request_deadline
+from src.utils.http_cache import cache_headers, etag_matches, make_etag, not_modified
 
 
 user_router = APIRouter()
@@ -18,8 +30,8 @@ IS_PROD = settings.ENV == "prod"
 COOKIE_DOMAIN = settings.COOKIE_DOMAIN 
 
 
-@user_router.post("/signup")
-async def signup_route(data: UserCreate, db: AsyncSession = Depends(get_db),current_user: User = Depends(require_roles(UserRole.superadmin))):
+@user_router.post("/signup", response_model=UserMutationResponse, dependencies=[Depends(admission("write"))])
+async def signup_route(data: UserCreate, db: AsyncSession = Depends(get_db),current_user: AuthPrincipal = Depends(require_permissions(Permission.create_users))):
     """
     Create a new user account.
     Only SuperAdmin Create Account.
@@ -46,12 +58,58 @@ async def signup_route(data: UserCreate, db: AsyncSession = Depends(get_db),curr
 
         
     except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
 
 
-@user_router.post("/login")
-async def login_route(data: Userlogin, response: Response, db: AsyncSession = Depends(get_db)):
+@user_router.post("/users/bulk", dependencies=[Depends(admission("write"))])
+async def bulk_signup_route(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.create_users)),
+):
+    """
+    Create many users in one request (superadmin only).
+
+    Accepts a JSON array of user objects, a text/csv body, or a multipart
+    upload with the CSV in a "file" field. CSV needs a header row with
+    username, email, password and role.
+
+    Returns:
+        Per-row report with status created, exists, duplicate or invalid.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None:
+                raise HTTPException(status_code=400, detail="Missing 'file' field")
+            rows = list(csv.DictReader(io.StringIO((await upload.read()).decode("utf-8-sig"))))
+        elif content_type.startswith("text/csv"):
+            rows = list(csv.DictReader(io.StringIO((await request.body()).decode("utf-8-sig"))))
+        else:
+            rows = await request.json()
+    except (ValueError, UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+
+    if not isinstance(rows, list) or not rows:
+        raise HTTPException(status_code=400, detail="No users provided")
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_IMPORT_MAX_ROWS} users per import")
+
+    user_object = UserService(db)
+    report = await user_object.bulk_signup_users(rows)
+    created = sum(1 for entry in report if entry["status"] == "created")
+    return {"message": f"{created} of {len(rows)} users created", "data": report}
+
+
+@user_router.post("/login", response_model=LoginResponse, dependencies=[Depends(admission("login"))])
+async def login_route(data: Userlogin, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """User login endpoint."""
+    if settings.LOGIN_RATE_LIMIT_ENABLED:
+        client_ip = request.client.host if request.client else "unknown"
+        await login_rate_limiter.check(client_ip, data.email)
+
     user_object = UserService(db)
     user = await user_object.authenticate_user(data.email, data.password)
    
@@ -60,9 +118,9 @@ async def login_route(data: Userlogin, response: Response, db: AsyncSession = De
    
     try:
         # Creating a session
-        session = await user_object.create_session(data.email)
+        session = await user_object.create_session(user)
     except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
    
     response.set_cookie(
         key="session_id",
@@ -78,14 +136,26 @@ async def login_route(data: Userlogin, response: Response, db: AsyncSession = De
     return {"message": "Login successful", "data": user}
 
 
-@user_router.get("/me")
-async def get_me(current_user: User = Depends(require_roles([UserRole.superadmin,UserRole.admin]))):
+@user_router.get("/me", response_model=CurrentUserResponse, dependencies=[Depends(admission("read"))])
+async def get_me(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.read_self)),
+):
     """Get current user profile."""
+    # Everything in the body comes from the already resolved principal
+    etag = make_etag(
+        "me", current_user.user_id, current_user.username, current_user.email,
+        current_user.role.value, current_user.expires_at,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
     return {"data": current_user}
 
 
 
-@user_router.post("/logout")
+@user_router.post("/logout", dependencies=[Depends(admission("login"))])
 async def logout_route(response: Response, session_id: str = Cookie(None), db: AsyncSession = Depends(get_db)):
     """User logout endpoint."""
     if session_id:
@@ -97,44 +167,134 @@ async def logout_route(response: Response, session_id: str = Cookie(None), db: A
         raise HTTPException(status_code=400, detail="No session found")
 
 
-@user_router.get("/users")
-async def get_users_route(current_user: User = Depends(require_roles(UserRole.superadmin)), db: AsyncSession = Depends(get_db)):
-    """Get all users (superadmin only or for user management)."""
+@user_router.post("/logout/all", response_model=RevokedSessionsResponse, dependencies=[Depends(admission("write"))])
+async def logout_all_route(
+    response: Response,
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.read_self)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ends every session of the current user, this one included."""
+    revoked = await UserService(db).revoke_all_sessions(current_user.email)
+    response.delete_cookie("session_id")
+    return {"message": "Logged out of all sessions", "revoked": revoked}
+
+
+@user_router.get("/users/{user_id}/sessions", response_model=SessionListResponse, dependencies=[Depends(admission("read"))])
+async def list_user_sessions_route(
+    user_id: int,
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.manage_sessions)),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """List a user's live sessions, oldest first."""
+    return {"data": await UserService(db).list_sessions(user_id)}
+
+
+@user_router.delete("/users/{user_id}/sessions", response_model=RevokedSessionsResponse, dependencies=[Depends(admission("write"))])
+async def revoke_user_sessions_route(
+    user_id: int,
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.manage_sessions)),
+    db: AsyncSession = Depends(get_db),
+):
+    """End every session of a user."""
     user_object = UserService(db)
-    try:
-        # Fetch all users
-        users = await user_object.get_users()
-        if not users:
-            raise HTTPException(status_code=404, detail="No users found")
-       
-        return {"data": users}
-    except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    user = await user_object.get_user_by_id(user_id)
+    revoked = await user_object.revoke_all_sessions(user.email)
+    return {"message": "Sessions revoked", "revoked": revoked}
+
+
+@user_router.get("/users", response_model=UserListResponse, dependencies=[Depends(admission("read"))])
+async def get_users_route(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma separated: " + ",".join(USER_LIST_FIELDS)),
+    role: Optional[UserRole] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    stream: bool = Query(False, description="Stream every matching user as NDJSON"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.list_users)),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """List users (superadmin only), keyset paginated by id."""
+    selected = tuple(f.strip() for f in fields.split(",") if f.strip()) if fields else USER_LIST_FIELDS
+    unknown = set(selected) - set(USER_LIST_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
 
+    user_object = UserService(db)
 
+    if stream:
+        async def ndjson():
+            # The body is sent after the admission slot is released; a long
+            # export must not run into the request's statement_timeout
+            request_deadline.set(None)
+            async for row in user_object.stream_users(selected, cursor, role, created_after, created_before):
+                yield orjson.dumps(row) + b"\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    # The page ETag covers the query and the (id, version) of every row on
+    # it, so a revalidation only reads those two columns.
+    if if_none_match:
+        versions = await user_object.list_user_versions(limit, cursor, role, created_after, created_before)
+        etag = make_etag("users", request.url.query, versions)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    users, next_cursor, versions = await user_object.list_users(
+        limit, cursor, selected, role, created_after, created_before
+    )
+    etag = make_etag("users", request.url.query, versions)
+    # Rows are plain dicts of JSON-native values: hand them straight to
+    # orjson rather than re-validating each one against the response model.
+    return ORJSONResponse({"data": users, "next_cursor": next_cursor}, headers=cache_headers(etag))
+
+
+
+@user_router.get("/users/search", response_model=UserListResponse, dependencies=[Depends(admission("read"))])
+async def search_users_route(
+    q: str = Query(..., min_length=1, max_length=100, description="Username or email, prefix first"),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.list_users)),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Search users by username or email for autocomplete (superadmin only)."""
+    users = await UserService(db).search_users(q, limit)
+    return ORJSONResponse({"data": users, "next_cursor": None})
 
-@user_router.get("/users/{user_id}")
+
+
+@user_router.get("/users/{user_id}", response_model=UserResponse, dependencies=[Depends(admission("read"))])
 async def get_user_by_id_route(
     user_id: int, 
-    current_user: User = Depends(require_roles(UserRole.superadmin)), 
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.read_users)), 
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific user by ID."""
     user_object = UserService(db)
     try:
+        if if_none_match:
+            # Revalidate against the version alone, without loading the row
+            etag = make_etag("user", user_id, await user_object.get_user_version(user_id))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
         user = await user_object.get_user_by_id(user_id)
-        
+        response.headers.update(cache_headers(make_etag("user", user_id, user.version)))
         return {"data": user}
     except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
 
 
 
-@user_router.put("/users/{user_id}")
+@user_router.put("/users/{user_id}", response_model=UserMutationResponse, dependencies=[Depends(admission("write"))])
 async def update_user_route(
     user_id: int,
     update_data: UserUpdate,
-    current_user: User = Depends(require_roles(UserRole.superadmin)),
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.update_users)),
     db: AsyncSession = Depends(get_db)
 ):
     """Update a user's information."""
@@ -156,15 +316,15 @@ async def update_user_route(
                 detail=response.get("error", "An error occurred")
             )
     except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
 
 
 
 
-@user_router.delete("/users/{user_id}")
+@user_router.delete("/users/{user_id}", response_model=MessageResponse, dependencies=[Depends(admission("write"))])
 async def delete_user_route(
     user_id: int,
-    current_user: User = Depends(require_roles(UserRole.superadmin)),
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.delete_users)),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a user account."""
@@ -180,16 +340,16 @@ async def delete_user_route(
                 detail=response.get("error", "An error occurred")
             )
     except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
 
 
 
-@user_router.put("/users/{user_id}/password")
+@user_router.put("/users/{user_id}/password", response_model=MessageResponse, dependencies=[Depends(admission("write"))])
 async def change_password_route(
     user_id: int,
     password_data: PasswordChange,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_roles(UserRole.superadmin))
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.manage_passwords))
 ):
     """Change a user's password."""
     user_object = UserService(db)
@@ -209,17 +369,17 @@ async def change_password_route(
                 detail=response.get("error", "An error occurred")
             )
     except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
 
 
 
-@user_router.put("/admin/users/{user_id}/password")
+@user_router.put("/admin/users/{user_id}/password", response_model=MessageResponse, dependencies=[Depends(admission("write"))])
 async def admin_change_password_route(
     user_id: int,
     password_data: AdminPasswordChange,
    
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_roles(UserRole.superadmin)),
+    current_user: AuthPrincipal = Depends(require_permissions(Permission.manage_passwords)),
 ):
     """Admin endpoint to change any user's password without requiring old password."""
     # Check if current user is admin
@@ -243,4 +403,4 @@ async def admin_change_password_route(
                 detail=response.get("error", "An error occurred")
             )
     except HTTPException as e:
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
@@ -1,4 +1,7 @@
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 import enum
 
@@ -9,6 +12,33 @@ class UserRole(enum.Enum):
 
 
 
+class Permission(enum.IntFlag):
+    """Fine-grained permissions that routes declare instead of roles."""
+    read_self = enum.auto()
+    list_users = enum.auto()
+    read_users = enum.auto()
+    create_users = enum.auto()
+    update_users = enum.auto()
+    delete_users = enum.auto()
+    manage_passwords = enum.auto()
+    manage_sessions = enum.auto()
+
+
+# Role -> permissions granted. Compiled once into frozen bitmasks below.
+ROLE_PERMISSIONS = {
+    UserRole.admin: Permission.read_self,
+    UserRole.superadmin: (
+        Permission.read_self | Permission.list_users | Permission.read_users
+        | Permission.create_users | Permission.update_users | Permission.delete_users
+        | Permission.manage_passwords | Permission.manage_sessions
+    ),
+}
+
+ROLE_MASKS = MappingProxyType({role: int(perms) for role, perms in ROLE_PERMISSIONS.items()})
+ROLE_BITS = MappingProxyType({role: 1 << index for index, role in enumerate(UserRole)})
+
+
+
 class UserCreate(BaseModel):
     username: str
     email: EmailStr
@@ -47,3 +77,105 @@ class AdminPasswordChange(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+
+# Response models. Routes declare these so output is validated and
+# serialized by pydantic-core instead of jsonable_encoder, and only the listed
+# fields (never password_hash) leave the API.
+
+class UserOut(BaseModel):
+    """Public view of a user."""
+    id: int
+    username: str
+    email: str
+    role: UserRole
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CurrentUserOut(BaseModel):
+    """The authenticated user as resolved from the session."""
+    user_id: int
+    username: str
+    email: str
+    role: UserRole
+    expires_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UserListItem(BaseModel):
+    """A user row in a listing; only the requested fields are present."""
+    id: Optional[int] = None
+    username: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[UserRole] = None
+    created_at: Optional[datetime] = None
+
+
+class UserResponse(BaseModel):
+    data: UserOut
+
+
+class LoginResponse(BaseModel):
+    message: str
+    data: UserOut
+
+
+class CurrentUserResponse(BaseModel):
+    data: CurrentUserOut
+
+
+class UserListResponse(BaseModel):
+    data: List[UserListItem]
+    next_cursor: Optional[int] = None
+
+
+class UserMutationResponse(BaseModel):
+    message: str
+    user: UserOut
+    status_code: int
+
+
+class MessageResponse(BaseModel):
+    message: str
+    status_code: int
+
+
+class SessionInfo(BaseModel):
+    """A live session; ref is a digest of the session ID, never the ID itself."""
+    ref: str
+    expires_at: Optional[datetime] = None
+
+
+class SessionListResponse(BaseModel):
+    data: List[SessionInfo]
+
+
+class RevokedSessionsResponse(BaseModel):
+    message: str
+    revoked: int
+
+
+
+@dataclass(frozen=True, slots=True)
+class AuthPrincipal:
+    """Authenticated user resolved from a session, used on the auth hot path."""
+    user_id: int
+    username: str
+    email: str
+    role: UserRole
+    session_id: str
+    expires_at: Optional[datetime]
+    # Compiled from the role once per principal, so every role/permission
+    # check on a request is a single AND.
+    role_bit: int = field(default=0, compare=False)
+    permissions: int = field(default=0, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "role_bit", ROLE_BITS.get(self.role, 0))
+        object.__setattr__(self, "permissions", ROLE_MASKS.get(self.role, 0))
@@ -0,0 +1,539 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal
+from src.config.settings import Settings
+from src.models.user import Session, User
+from src.schemas.user_schema import AuthPrincipal, UserRole
+from src.utils.group_commit import GroupCommitter
+from src.utils.kv_client import KVClient, KVError
+from src.utils.session_cache import session_cache
+from src.utils.session_tokens import KVRevocationList, MemoryRevocationList, TokenSigner, parse_token_keys
+
+settings = Settings()
+
+# Built once at import so every request reuses the same compiled statement.
+AUTH_LOOKUP = (
+    select(Session.expires_at, User.id, User.username, User.email, User.role)
+    .join(User, User.email == Session.user_mail)
+    .where(Session.session_id == bindparam("session_id"))
+)
+
+
+# For a batch of users, the sessions ranked past each user's `keep` newest.
+_RANKED_SESSIONS = (
+    select(
+        Session.id,
+        func.row_number().over(
+            partition_by=Session.user_mail,
+            order_by=(Session.created_at.desc(), Session.id.desc()),
+        ).label("rank"),
+    )
+    .where(Session.user_mail.in_(bindparam("user_mails", expanding=True)))
+    .subquery()
+)
+EVICT_OVER_CAP = (
+    delete(Session)
+    .where(Session.id.in_(select(_RANKED_SESSIONS.c.id).where(_RANKED_SESSIONS.c.rank > bindparam("keep"))))
+    .returning(Session.session_id)
+    .execution_options(synchronize_session=False)
+)
+
+
+def new_principal(user: User, ttl_seconds: int) -> AuthPrincipal:
+    return AuthPrincipal(
+        user_id=user.id,
+        username=user.username,
+        email=user.email,
+        role=UserRole(user.role),
+        session_id=str(uuid.uuid4()),
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+    )
+
+
+class SessionStore(ABC):
+    """
+    Where login sessions live.
+
+    Every method takes the request's AsyncSession; backends that do not
+    use the relational database simply ignore it.
+    """
+
+    def __init__(self, ttl_seconds: int, idle_timeout_seconds: int = 0):
+        self.ttl_seconds = ttl_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+
+    @abstractmethod
+    async def create(self, db: AsyncSession, user: User) -> AuthPrincipal:
+        """Creates a session for the user."""
+
+    @abstractmethod
+    async def get(self, db: AsyncSession, session_id: str) -> Optional[AuthPrincipal]:
+        """Returns the session's principal, or None if it does not exist."""
+
+    @abstractmethod
+    async def revoke(self, db: AsyncSession, session_id: str) -> Optional[str]:
+        """Deletes a session. Returns its user's email, or None if it did not exist."""
+
+    @abstractmethod
+    async def revoke_user(self, db: AsyncSession, user_mail: str) -> int:
+        """Deletes every session of a user. Returns how many were removed."""
+
+    async def list_user(self, db: AsyncSession, user_mail: str) -> List[Tuple[str, datetime]]:
+        """A user's live sessions as (session_id, expires_at), oldest first."""
+        return []
+
+    async def evict_oldest(self, db: AsyncSession, user_mail: str, keep: int) -> List[str]:
+        """
+        Deletes all but the user's `keep` newest sessions and returns the
+        removed IDs. Called just before create() to enforce a session cap.
+        """
+        return []
+
+    async def close(self) -> None:
+        pass
+
+
+class SqlSessionStore(SessionStore):
+    """Sessions in the Postgres sessions table."""
+
+    async def create(self, db: AsyncSession, user: User) -> AuthPrincipal:
+        principal = new_principal(user, self.ttl_seconds)
+        db.add(Session(
+            user_mail=principal.email,
+            session_id=principal.session_id,
+            expires_at=principal.expires_at,
+        ))
+        await db.commit()
+        return principal
+
+    async def get(self, db: AsyncSession, session_id: str) -> Optional[AuthPrincipal]:
+        result = await db.execute(AUTH_LOOKUP, {"session_id": session_id})
+        row = result.one_or_none()
+        if not row:
+            return None
+        expires_at = row.expires_at
+        if expires_at.tzinfo is None:
+            # SQLite drops the offset; stored values are UTC
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return AuthPrincipal(
+            user_id=row.id,
+            username=row.username,
+            email=row.email,
+            role=row.role,
+            session_id=session_id,
+            expires_at=expires_at,
+        )
+
+    async def revoke(self, db: AsyncSession, session_id: str) -> Optional[str]:
+        result = await db.execute(
+            delete(Session).where(Session.session_id == session_id).returning(Session.user_mail)
+        )
+        user_mail = result.scalar_one_or_none()
+        await db.commit()
+        return user_mail
+
+    async def revoke_user(self, db: AsyncSession, user_mail: str) -> int:
+        result = await db.execute(delete(Session).where(Session.user_mail == user_mail))
+        await db.commit()
+        return result.rowcount
+
+    async def list_user(self, db: AsyncSession, user_mail: str) -> List[Tuple[str, datetime]]:
+        result = await db.execute(
+            select(Session.session_id, Session.expires_at)
+            .where(Session.user_mail == user_mail)
+            .order_by(Session.created_at, Session.id)
+        )
+        return [(row.session_id, row.expires_at) for row in result]
+
+    async def evict_oldest(self, db: AsyncSession, user_mail: str, keep: int) -> List[str]:
+        # One DELETE over the user's index range; left uncommitted so the
+        # eviction and the following create() share a transaction.
+        newest = (
+            select(Session.id)
+            .where(Session.user_mail == user_mail)
+            .order_by(Session.created_at.desc(), Session.id.desc())
+            .limit(keep)
+        )
+        result = await db.execute(
+            delete(Session)
+            .where(Session.user_mail == user_mail, Session.id.not_in(newest))
+            .returning(Session.session_id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars())
+
+
+class GroupCommitSqlSessionStore(SqlSessionStore):
+    """
+    SQL sessions written behind through a GroupCommitter.
+
+    Concurrent logins are inserted with one multi-row INSERT per batch, in
+    a transaction of the flusher's own; each login returns once its batch
+    has committed. All columns are generated here, so nothing is read back.
+    The per-user cap is applied to the whole batch with a single DELETE
+    right after the insert, in the same transaction. If a row violates a
+    constraint (say its user was deleted while the login was queued), the
+    batch is retried row by row so only that login fails.
+    """
+
+    def __init__(self, ttl_seconds: int, window_seconds: float, max_batch: int, max_sessions_per_user: int = 0):
+        super().__init__(ttl_seconds)
+        self.max_sessions_per_user = max_sessions_per_user
+        self.committer = GroupCommitter(self._write_batch, window_seconds, max_batch)
+
+    async def create(self, db: AsyncSession, user: User) -> AuthPrincipal:
+        principal = new_principal(user, self.ttl_seconds)
+        await self.committer.submit({
+            "user_mail": principal.email,
+            "session_id": principal.session_id,
+            "created_at": datetime.now(timezone.utc),
+            "expires_at": principal.expires_at,
+        })
+        return principal
+
+    async def evict_oldest(self, db: AsyncSession, user_mail: str, keep: int) -> List[str]:
+        # Done per batch in _write_batch
+        return []
+
+    async def _write_batch(self, rows: List[dict]) -> list:
+        try:
+            await self._insert(rows)
+            return [None] * len(rows)
+        except IntegrityError as e:
+            if len(rows) == 1:
+                return [e]
+            logging.warning(f"Session batch of {len(rows)} rejected, retrying row by row: {e.orig}")
+
+        results = []
+        for row in rows:
+            try:
+                await self._insert([row])
+                results.append(None)
+            except IntegrityError as e:
+                results.append(e)
+        return results
+
+    async def _insert(self, rows: List[dict]) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(Session).values(rows))
+            evicted = []
+            if self.max_sessions_per_user > 0:
+                result = await db.execute(EVICT_OVER_CAP, {
+                    "user_mails": sorted({row["user_mail"] for row in rows}),
+                    "keep": self.max_sessions_per_user,
+                })
+                evicted = result.scalars().all()
+            await db.commit()
+        for session_id in evicted:
+            session_cache.invalidate(session_id)
+
+    async def close(self) -> None:
+        await self.committer.close()
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions in process memory, split over shards by session ID hash.
+
+    Nothing is shared between workers or survives a restart, so this is for
+    single-worker deployments, development and benchmarks.
+    """
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self, ttl_seconds: int, idle_timeout_seconds: int = 0, shards: int = 16):
+        super().__init__(ttl_seconds, idle_timeout_seconds)
+        # session_id -> (principal, idle deadline on the monotonic clock or None)
+        self._shards: List[Dict[str, tuple]] = [{} for _ in range(max(shards, 1))]
+        self._by_user: Dict[str, set] = {}
+        self._writes = 0
+
+    def _shard(self, session_id: str) -> Dict[str, tuple]:
+        return self._shards[zlib.crc32(session_id.encode()) % len(self._shards)]
+
+    def _idle_deadline(self) -> Optional[float]:
+        if self.idle_timeout_seconds > 0:
+            return time.monotonic() + self.idle_timeout_seconds
+        return None
+
+    async def create(self, db: AsyncSession, user: User) -> AuthPrincipal:
+        principal = new_principal(user, self.ttl_seconds)
+        shard = self._shard(principal.session_id)
+        shard[principal.session_id] = (principal, self._idle_deadline())
+        self._by_user.setdefault(principal.email, set()).add(principal.session_id)
+
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            self._sweep(shard)
+        return principal
+
+    async def get(self, db: AsyncSession, session_id: str) -> Optional[AuthPrincipal]:
+        shard = self._shard(session_id)
+        entry = shard.get(session_id)
+        if entry is None:
+            return None
+        principal, idle_deadline = entry
+        if self._expired(principal, idle_deadline):
+            self._remove(session_id)
+            return None
+        if idle_deadline is not None:
+            shard[session_id] = (principal, self._idle_deadline())
+        return principal
+
+    async def revoke(self, db: AsyncSession, session_id: str) -> Optional[str]:
+        return self._remove(session_id)
+
+    async def revoke_user(self, db: AsyncSession, user_mail: str) -> int:
+        return sum(self._remove(session_id) is not None for session_id in list(self._by_user.get(user_mail, ())))
+
+    async def list_user(self, db: AsyncSession, user_mail: str) -> List[Tuple[str, datetime]]:
+        live = []
+        for session_id in list(self._by_user.get(user_mail, ())):
+            principal, idle_deadline = self._shard(session_id)[session_id]
+            if self._expired(principal, idle_deadline):
+                self._remove(session_id)
+            else:
+                live.append((session_id, principal.expires_at))
+        # Every session gets the same TTL, so expiry order is creation order
+        live.sort(key=lambda entry: entry[1])
+        return live
+
+    async def evict_oldest(self, db: AsyncSession, user_mail: str, keep: int) -> List[str]:
+        live = await self.list_user(db, user_mail)
+        evicted = [session_id for session_id, _ in live[:max(len(live) - keep, 0)]]
+        for session_id in evicted:
+            self._remove(session_id)
+        return evicted
+
+    def _remove(self, session_id: str) -> Optional[str]:
+        """Drops a session; returns its user's email, or None if it was not there."""
+        entry = self._shard(session_id).pop(session_id, None)
+        if entry is None:
+            return None
+        user_mail = entry[0].email
+        sessions = self._by_user.get(user_mail)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._by_user[user_mail]
+        return user_mail
+
+    @staticmethod
+    def _expired(principal: AuthPrincipal, idle_deadline: Optional[float]) -> bool:
+        if idle_deadline is not None and idle_deadline <= time.monotonic():
+            return True
+        return principal.expires_at <= datetime.now(timezone.utc)
+
+    def _sweep(self, shard: Dict[str, tuple]) -> None:
+        for session_id, (principal, idle_deadline) in list(shard.items()):
+            if self._expired(principal, idle_deadline):
+                self._remove(session_id)
+
+
+class KVSessionStore(SessionStore):
+    """
+    Sessions in a Redis-protocol key-value server.
+
+    Keys expire on their own. With an idle timeout, every read slides the
+    expiry forward, capped at the session's absolute expiry. Revoke
+    is a single GETDEL, so concurrent revokes of the same session agree on
+    who removed it. A per-user set of session IDs backs revoke_user, which
+    renames the set away before reading it.
+    """
+
+    def __init__(self, client: KVClient, ttl_seconds: int, idle_timeout_seconds: int = 0, prefix: str = "session:"):
+        super().__init__(ttl_seconds, idle_timeout_seconds)
+        self.client = client
+        self.prefix = prefix
+        self.user_prefix = prefix + "user:"
+
+    def _ttl_ms(self, principal: AuthPrincipal) -> int:
+        remaining = (principal.expires_at - datetime.now(timezone.utc)).total_seconds()
+        if self.idle_timeout_seconds > 0:
+            remaining = min(remaining, self.idle_timeout_seconds)
+        return max(int(remaining * 1000), 1)
+
+    async def create(self, db: AsyncSession, user: User) -> AuthPrincipal:
+        principal = new_principal(user, self.ttl_seconds)
+        payload = json.dumps({
+            "user_id": principal.user_id,
+            "username": principal.username,
+            "email": principal.email,
+            "role": principal.role.value,
+            "expires_at": principal.expires_at.isoformat(),
+        })
+        await self.client.execute("SET", self.prefix + principal.session_id, payload, "PX", self._ttl_ms(principal))
+        user_key = self.user_prefix + principal.email
+        await self.client.execute("SADD", user_key, principal.session_id)
+        await self.client.execute("PEXPIRE", user_key, self.ttl_seconds * 1000)
+        return principal
+
+    async def get(self, db: AsyncSession, session_id: str) -> Optional[AuthPrincipal]:
+        key = self.prefix + session_id
+        payload = await self.client.get(key)
+        if payload is None:
+            return None
+        data = json.loads(payload)
+        principal = AuthPrincipal(
+            user_id=data["user_id"],
+            username=data["username"],
+            email=data["email"],
+            role=UserRole(data["role"]),
+            session_id=session_id,
+            expires_at=datetime.fromisoformat(data["expires_at"]),
+        )
+        if self.idle_timeout_seconds > 0:
+            await self.client.execute("PEXPIRE", key, self._ttl_ms(principal))
+        return principal
+
+    async def revoke(self, db: AsyncSession, session_id: str) -> Optional[str]:
+        payload = await self.client.execute("GETDEL", self.prefix + session_id)
+        if payload is None:
+            return None
+        user_mail = json.loads(payload)["email"]
+        await self.client.execute("SREM", self.user_prefix + user_mail, session_id)
+        return user_mail
+
+    async def revoke_user(self, db: AsyncSession, user_mail: str) -> int:
+        # Move the index aside in one step, so a login racing with this adds
+        # its session to a fresh set instead of one about to be deleted unread
+        revoking_key = f"{self.user_prefix}{user_mail}:revoking:{uuid.uuid4().hex}"
+        try:
+            await self.client.execute("RENAME", self.user_prefix + user_mail, revoking_key)
+        except KVError:
+            # No index: the user has no sessions
+            return 0
+        session_ids = await self.client.execute("SMEMBERS", revoking_key) or []
+        removed = 0
+        if session_ids:
+            removed = await self.client.execute("DEL", *(self.prefix + sid for sid in session_ids))
+        await self.client.execute("DEL", revoking_key)
+        return removed
+
+    async def list_user(self, db: AsyncSession, user_mail: str) -> List[Tuple[str, datetime]]:
+        user_key = self.user_prefix + user_mail
+        session_ids = await self.client.execute("SMEMBERS", user_key) or []
+        payloads = await asyncio.gather(*(self.client.get(self.prefix + sid) for sid in session_ids))
+        live, gone = [], []
+        for session_id, payload in zip(session_ids, payloads):
+            if payload is None:
+                gone.append(session_id)
+            else:
+                live.append((session_id, datetime.fromisoformat(json.loads(payload)["expires_at"])))
+        if gone:
+            # Expired on their own; drop them from the index too
+            await self.client.execute("SREM", user_key, *gone)
+        live.sort(key=lambda entry: entry[1])
+        return live
+
+    async def evict_oldest(self, db: AsyncSession, user_mail: str, keep: int) -> List[str]:
+        live = await self.list_user(db, user_mail)
+        evicted = [session_id for session_id, _ in live[:max(len(live) - keep, 0)]]
+        if evicted:
+            await self.client.execute("DEL", *(self.prefix + sid for sid in evicted))
+            await self.client.execute("SREM", self.user_prefix + user_mail, *evicted)
+        return evicted
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class TokenSessionStore(SessionStore):
+    """
+    Stateless sessions: the cookie is a signed token carrying the principal.
+
+    Validation is a signature and expiry check plus a revocation-list
+    lookup, with no database access. Logout revokes the token id; revoking
+    a user rejects every token issued to them before that moment.
+    """
+
+    def __init__(self, signer: TokenSigner, revocations, ttl_seconds: int):
+        super().__init__(ttl_seconds)
+        self.signer = signer
+        self.revocations = revocations
+
+    async def create(self, db: AsyncSession, user: User) -> AuthPrincipal:
+        return self.signer.issue(user.id, user.username, user.email, UserRole(user.role), self.ttl_seconds)
+
+    async def get(self, db: AsyncSession, session_id: str) -> Optional[AuthPrincipal]:
+        decoded = self.signer.decode(session_id)
+        if decoded is None:
+            return None
+        principal, claims = decoded
+        if await self.revocations.is_revoked(claims):
+            return None
+        return principal
+
+    async def revoke(self, db: AsyncSession, session_id: str) -> Optional[str]:
+        decoded = self.signer.decode(session_id)
+        if decoded is None:
+            return None
+        _, claims = decoded
+        if await self.revocations.is_revoked(claims):
+            return None
+        await self.revocations.revoke(claims)
+        return claims["sub"]
+
+    async def revoke_user(self, db: AsyncSession, user_mail: str) -> int:
+        await self.revocations.revoke_user(user_mail)
+        return 0
+
+    async def close(self) -> None:
+        client = getattr(self.revocations, "client", None)
+        if client is not None:
+            await client.close()
+
+
+def build_session_store(settings: Settings = settings) -> SessionStore:
+    """Creates the backend selected by SESSION_STORE (sql, memory, kv or token)."""
+    backend = settings.SESSION_STORE
+    if backend == "sql":
+        if settings.SESSION_GROUP_COMMIT:
+            return GroupCommitSqlSessionStore(
+                settings.SESSION_TTL_SECONDS,
+                window_seconds=settings.SESSION_GROUP_COMMIT_WINDOW_MS / 1000,
+                max_batch=settings.SESSION_GROUP_COMMIT_MAX_BATCH,
+                max_sessions_per_user=settings.MAX_SESSIONS_PER_USER,
+            )
+        return SqlSessionStore(settings.SESSION_TTL_SECONDS)
+    if backend == "memory":
+        return MemorySessionStore(
+            settings.SESSION_TTL_SECONDS,
+            settings.SESSION_IDLE_TIMEOUT_SECONDS,
+            shards=settings.SESSION_STORE_SHARDS,
+        )
+    if backend == "kv":
+        return KVSessionStore(
+            KVClient(settings.SESSION_KV_URL, pool_size=settings.SESSION_KV_POOL_SIZE),
+            settings.SESSION_TTL_SECONDS,
+            settings.SESSION_IDLE_TIMEOUT_SECONDS,
+        )
+    if backend == "token":
+        if settings.SESSION_TOKEN_REVOCATION == "kv":
+            revocations = KVRevocationList(
+                KVClient(settings.SESSION_KV_URL, pool_size=settings.SESSION_KV_POOL_SIZE),
+                settings.SESSION_TTL_SECONDS,
+            )
+        else:
+            revocations = MemoryRevocationList(settings.SESSION_TTL_SECONDS)
+        return TokenSessionStore(
+            TokenSigner(parse_token_keys(settings.SESSION_TOKEN_KEYS)),
+            revocations,
+            settings.SESSION_TTL_SECONDS,
+        )
+    raise ValueError(f"Unknown SESSION_STORE '{backend}' (expected sql, memory, kv or token)")
+
+
+session_store = build_session_store()
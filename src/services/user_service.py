@@ -1,18 +1,110 @@
-from datetime import datetime,timezone,timedelta
-import uuid
+from datetime import datetime,timezone
+import hashlib
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
-from src.config.database import get_db
-from src.models.user import User,Session
-from src.schemas.user_schema import UserCreate
+from typing import AsyncIterator, List, Optional, Sequence
+from src.config.database import AsyncSessionLocal, ReadSessionLocal, engine, get_db, insert, may_read_replica
+from src.models.user import User
+from src.schemas.user_schema import UserCreate, AuthPrincipal, UserRole
 from fastapi import Cookie, Depends, HTTPException
-from passlib.context import CryptContext
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy import case, func, or_, select, text
+from pydantic import ValidationError
+from src.utils.session_cache import session_cache
+from src.utils.search_cache import search_cache
+from src.utils.audit_log import audit_log
+from src.utils.password_hasher import password_hasher
+from src.services.session_store import session_store
+from src.utils.metrics import auth_lookups
+from src.config.settings import Settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Columns a user listing may project; password_hash is never selectable.
+USER_LIST_FIELDS = ("id", "username", "email", "role", "created_at")
+
+# Rows per multi-row INSERT (keeps bind parameters well under asyncpg's limit).
+BULK_INSERT_CHUNK = 1000
 import logging
 
+settings = Settings()
+
+
+def build_user_list_query(
+    fields: Sequence[str] = USER_LIST_FIELDS,
+    after_id: Optional[int] = None,
+    role: Optional[UserRole] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = None,
+):
+    """Builds a keyset-ordered SELECT over only the requested user columns."""
+    columns = [getattr(User, field) for field in fields]
+    stmt = select(*columns).order_by(User.id)
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    if created_after is not None:
+        stmt = stmt.where(User.created_at >= created_after)
+    if created_before is not None:
+        stmt = stmt.where(User.created_at < created_before)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+# Queries shorter than this only match as prefixes (trigrams need 3 characters)
+SEARCH_MIN_SUBSTRING = 3
+
+# Whether pg_trgm's % operator and similarity() exist; set by detect_trigram_support()
+trigram_search = False
+
+
+async def detect_trigram_support(db_engine=engine) -> bool:
+    """
+    Checks once, at startup, whether the pg_trgm extension is installed.
+    migrate skips it when it can't be created; search then leaves out the
+    similarity clauses instead of failing.
+    """
+    global trigram_search
+    trigram_search = False
+    if db_engine.dialect.name == "postgresql":
+        async with db_engine.connect() as conn:
+            result = await conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+            trigram_search = result.scalar() is not None
+    if not trigram_search:
+        logging.info("pg_trgm not installed, user search uses prefix and substring matching only")
+    return trigram_search
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_user_search_query(query: str, limit: int, trigram: bool = False):
+    """
+    Builds a ranked search over username and email.
+
+    Prefix matches (served by the text_pattern_ops indexes) rank first. From
+    SEARCH_MIN_SUBSTRING characters on, substring matches and, with `trigram`
+    (pg_trgm installed), trigram-similar names follow, ordered by similarity;
+    the pg_trgm GIN indexes serve both. Ties go to the shorter username.
+    """
+    username, email = func.lower(User.username), func.lower(User.email)
+    prefix = _escape_like(query) + "%"
+    is_prefix = or_(username.like(prefix, escape="\\"), email.like(prefix, escape="\\"))
+    condition = is_prefix
+    order = [case((is_prefix, 0), else_=1)]
+
+    if len(query) >= SEARCH_MIN_SUBSTRING:
+        substring = "%" + _escape_like(query) + "%"
+        condition = or_(condition, username.like(substring, escape="\\"), email.like(substring, escape="\\"))
+        if trigram:
+            condition = or_(condition, username.op("%")(query), email.op("%")(query))
+            order.append(func.greatest(func.similarity(username, query), func.similarity(email, query)).desc())
+
+    order += [func.length(User.username), User.id]
+    return select(*(getattr(User, field) for field in USER_LIST_FIELDS)).where(condition).order_by(*order).limit(limit)
+
 
 class UserSerivice:
     def __init__(self, db: AsyncSession):
@@ -23,21 +115,16 @@ class UserSerivice:
     async def signup_user(self, data: UserCreate):
         """Registers a new user in the system."""
         
-        logging.info(f"Attempting to create user with email: {data}")
+        logging.info("Attempting to create user with email: %s", data.email)
         result = await self.db.execute(select(User).where(User.email == data.email))
         existing_user = result.scalar_one_or_none()
-        logging.debug(f"Existing user found: {existing_user}")
+        logging.debug("Existing user found: %s", existing_user is not None)
 
         
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         
-        logging.debug("hashing password")
-        # test_hash = pwd_context.hash("test123")
-        # print(pwd_context.verify("test123", test_hash))
-        
-        hashed_pw = pwd_context.hash(data.password)
-        logging.info(f"Password hashed for user: {data.email}")
+        hashed_pw = await password_hasher.hash(data.password)
 
 
         new_user = User(
@@ -47,16 +134,13 @@ class UserSerivice:
             role=data.role.value,
         )
 
-        logging.info(f"role:{data.role.value}") 
-
         try:
-            logging.debug("adding user to db")
             self.db.add(new_user)
-            logging.info("successfully user added")
-            
             await self.db.commit()
             await self.db.refresh(new_user)
-            logging.info("user added")
+            search_cache.invalidate()
+            await audit_log.record("signup", data.email)
+            logging.info("User %s created with role %s", data.email, data.role.value)
             return {"message": "User created successfully", "user": new_user ,"status_code": 200}
         
         except SQLAlchemyError as e:
@@ -74,52 +158,187 @@ class UserSerivice:
     
 
 
+    async def bulk_signup_users(self, rows: List[dict]):
+        """
+        Creates many users at once.
+        Rows are validated individually, existing emails are found with one
+        set-based query, passwords are hashed in parallel and the users are
+        written with multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+        Returns:
+            list: One report entry per input row.
+        """
+        report = [None] * len(rows)
+        valid = {}  # email -> (row index, UserCreate)
+
+        for index, row in enumerate(rows):
+            try:
+                data = UserCreate(**row)
+            except ValidationError as e:
+                # Field and message only: str(e) would echo the submitted values, password included
+                errors = e.errors(include_url=False, include_input=False)
+                message = "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in errors)
+                report[index] = {"row": index, "status": "invalid", "error": message}
+                continue
+            except TypeError:
+                report[index] = {"row": index, "status": "invalid", "error": "Row must be an object"}
+                continue
+            if data.email in valid:
+                report[index] = {"row": index, "email": data.email, "status": "duplicate"}
+                continue
+            valid[data.email] = (index, data)
+
+        if valid:
+            result = await self.db.execute(select(User.email).where(User.email.in_(list(valid))))
+            for email in result.scalars():
+                index, _ = valid.pop(email)
+                report[index] = {"row": index, "email": email, "status": "exists"}
+
+        pending = list(valid.values())
+        hashes = await password_hasher.hash_many([data.password for _, data in pending])
+
+        try:
+            for start in range(0, len(pending), BULK_INSERT_CHUNK):
+                chunk = pending[start:start + BULK_INSERT_CHUNK]
+                stmt = (
+                    insert(User)
+                    .values([
+                        {
+                            "username": data.username,
+                            "email": data.email,
+                            "password_hash": hashed,
+                            "role": data.role.value,
+                        }
+                        for (_, data), hashed in zip(chunk, hashes[start:start + BULK_INSERT_CHUNK])
+                    ])
+                    .on_conflict_do_nothing(index_elements=[User.email])
+                    .returning(User.id, User.email)
+                )
+                result = await self.db.execute(stmt)
+                created = dict((email, user_id) for user_id, email in result.all())
+                for index, data in chunk:
+                    if data.email in created:
+                        report[index] = {"row": index, "email": data.email, "status": "created", "id": created[data.email]}
+                    else:
+                        # Inserted concurrently by another request
+                        report[index] = {"row": index, "email": data.email, "status": "exists"}
+            await self.db.commit()
+            search_cache.invalidate()
+
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Bulk import failed: {e}")
+            raise HTTPException(status_code=500, detail="Bulk import failed, no users were created")
+
+        for entry in report:
+            if entry["status"] == "created":
+                await audit_log.record("signup", entry["email"])
+        logging.info(f"Bulk import: {sum(1 for r in report if r['status'] == 'created')} of {len(rows)} users created")
+        return report
+
+    
+
+
     async def authenticate_user(self,email:str,password:str):
         """Authenticates a user by email and password.""" 
         result=await self.db.execute(select(User).where(User.email==email))
         user=result.scalar_one_or_none()
         #user =await self.db.query(User).filter(User.email==email).first()
         if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        if not pwd_context.verify(password, user.password_hash):
+            # Same cost and response as a wrong password
+            await password_hasher.dummy_verify(password)
+            await audit_log.record("login_failed", email)
             raise HTTPException(status_code=401, detail="Invalid credentials")
+        valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+        if not valid:
+            await audit_log.record("login_failed", email)
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+
+        if new_hash:
+            # Stored hash uses an outdated scheme or cost, upgrade it transparently
+            user.password_hash = new_hash
+            try:
+                await self.db.commit()
+            except StaleDataError:
+                # A concurrent login upgraded it first
+                await self.db.rollback()
+                await self.db.refresh(user)
         
         return user
     
     
     
 
-    async def create_session(self,user_email:str):
-        """Creates a new session for the user."""
+    async def create_session(self, user: User) -> AuthPrincipal:
+        """
+        Creates a new session for the user in the configured session store.
+        With MAX_SESSIONS_PER_USER set, the user's oldest sessions are ended
+        first so that the new one fits under the cap.
+        """
+        if settings.MAX_SESSIONS_PER_USER > 0:
+            evicted = await session_store.evict_oldest(self.db, user.email, settings.MAX_SESSIONS_PER_USER - 1)
+            for session_id in evicted:
+                session_cache.invalidate(session_id)
+        principal = await session_store.create(self.db, user)
+        await audit_log.record("login", user.email, principal.session_id)
+        return principal
 
-        session_id = str(uuid.uuid4())  # Generate a unique session ID  
-        new_session = Session(
-            user_mail=user_email,
-            session_id=session_id,
-            expires_at=datetime.now(timezone.utc) + timedelta(days=7)
-        )
-        self.db.add(new_session)
-        await self.db.commit()
-        self.db.refresh(new_session)
-        return new_session
-    
 
-    async def validate_session(self, session_id: str):
-        print(session_id)
-        result = await self.db.execute(select(Session).where(Session.session_id == session_id))
-        session = result.scalar_one_or_none()
-        if session:
-            result2=await self.db.execute(select(User).where(User.email==session.user_mail))
-            user=result2.scalar_one_or_none()
+
+    async def list_sessions(self, user_id: int) -> List[dict]:
+        """
+        Lists a user's live sessions, oldest first.
+        Session IDs are bearer credentials, so only a digest is returned.
+        """
+        user = await self.get_user_by_id(user_id)
+        sessions = await session_store.list_user(self.db, user.email)
+        return [
+            {"ref": hashlib.sha256(session_id.encode()).hexdigest()[:16], "expires_at": expires_at}
+            for session_id, expires_at in sessions
+        ]
+
+
+
+    async def revoke_all_sessions(self, user_mail: str) -> int:
+        """Ends every session of a user in one store operation. Returns how many."""
+        session_cache.invalidate_user(user_mail)
+        try:
+            revoked = await session_store.revoke_user(self.db, user_mail)
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logging.error(f"Error revoking sessions: {str(e)}")
+            raise HTTPException(status_code=500, detail="Revoking sessions failed")
+        session_cache.invalidate_user(user_mail)
+        await audit_log.record("logout_all", user_mail)
+        return revoked
     
-        
-        if not session :
+
+    async def validate_session(self, session_id: str) -> AuthPrincipal:
+        """Resolves a session ID to an AuthPrincipal."""
+        principal = session_cache.get(session_id)
+        if principal is not None:
+            auth_lookups.inc(1, "cache")
+            return principal
+
+        auth_lookups.inc(1, "store")
+        generation = session_cache.generation
+        if may_read_replica(self.db):
+            # A lagging replica may still hold a revoked session (or not yet
+            # a new one), and what is found here gets cached: ask the primary.
+            # The cache keeps these misses rare.
+            async with AsyncSessionLocal() as primary:
+                principal = await session_store.get(primary, session_id)
+        else:
+            principal = await session_store.get(self.db, session_id)
+
+        if not principal:
             raise HTTPException(status_code=404, detail="Session not found")
-        
-        if session.expires_at < datetime.now(timezone.utc):
+
+        if principal.expires_at < datetime.now(timezone.utc):
             raise HTTPException(status_code=401, detail="Session expired")
-        
-        return session,user
+
+        session_cache.set(principal, generation)
+        return principal
     
 
 
@@ -127,30 +346,226 @@ class UserSerivice:
 
     async def logout_user(self, session_id: str):
         """Logs out a user by deleting their session."""
-        
+        session_cache.invalidate(session_id)
         try:
-            
-                # Find the session
-                result = await self.db.execute(select(Session).where(Session.session_id == session_id))
-                session = result.scalar_one_or_none()
-                
-                if not session:
-                    raise HTTPException(status_code=404, detail="Session not found")
-                
-                # Delete the session
-                await self.db.delete(session)
-                
-                # Explicitly flush to ensure deletion is processed
-                await self.db.commit()
-                
-                 # Transaction will automatically commit when exiting the context
-                return {"msg": "User logged out successfully"}
-        
+            user_mail = await session_store.revoke(self.db, session_id)
         except Exception as e:
-            # Log the error for debugging
-            # logger.error(f"Error during logout: {str(e)}")
+            logging.error(f"Error during logout: {str(e)}")
             raise HTTPException(status_code=500, detail="Logout failed")
-            
+
+        # Again once the store no longer has it, for lookups that were in flight
+        session_cache.invalidate(session_id)
+        if user_mail is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        await audit_log.record("logout", user_mail, session_id)
+        return {"msg": "User logged out successfully"}
+
+
+
+    async def list_users(
+        self,
+        limit: int,
+        after_id: Optional[int] = None,
+        fields: Sequence[str] = USER_LIST_FIELDS,
+        role: Optional[UserRole] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ):
+        """
+        Returns one page of users ordered by id.
+        Returns:
+            tuple: (rows as dicts, next_cursor, versions) where next_cursor is
+            the last id of the page, or None when there are no more rows, and
+            versions is what list_user_versions() returns for the same page.
+        """
+        select_fields = ("id", "version", *(f for f in fields if f not in ("id", "version")))
+        stmt = build_user_list_query(
+            select_fields, after_id, role, created_after, created_before, limit + 1
+        )
+        result = await self.db.execute(stmt)
+        rows = result.all()
+        versions = [(row[0], row[1]) for row in rows]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
+
+        # Build the dicts straight from the row tuples
+        positions = [(field, select_fields.index(field)) for field in fields]
+        return [{field: row[index] for field, index in positions} for row in rows], next_cursor, versions
+
+
+
+    async def list_user_versions(
+        self,
+        limit: int,
+        after_id: Optional[int] = None,
+        role: Optional[UserRole] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ):
+        """
+        Returns (id, version) for the rows list_users() would return, plus the
+        one that decides next_cursor. Reads only those two columns, so a page
+        can be revalidated without fetching it.
+        """
+        stmt = build_user_list_query(
+            ("id", "version"), after_id, role, created_after, created_before, limit + 1
+        )
+        result = await self.db.execute(stmt)
+        return [(row[0], row[1]) for row in result.all()]
+
+
+
+    async def stream_users(
+        self,
+        fields: Sequence[str] = USER_LIST_FIELDS,
+        after_id: Optional[int] = None,
+        role: Optional[UserRole] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Yields users one by one through a server-side cursor.
+        Uses its own session: the request session is closed before a
+        streaming response body is sent.
+        """
+        stmt = build_user_list_query(fields, after_id, role, created_after, created_before)
+        async with ReadSessionLocal() as db:
+            result = await db.stream(stmt.execution_options(yield_per=500))
+            async for row in result:
+                yield dict(zip(fields, row))
+
+
+
+    async def search_users(self, query: str, limit: int) -> List[dict]:
+        """
+        Ranked username/email search for autocomplete. Results are cached
+        per worker; any user write here clears the cache.
+        """
+        query = query.strip().lower()
+        key = (query, limit)
+        rows = search_cache.get(key)
+        if rows is not None:
+            return rows
+
+        generation = search_cache.generation
+        result = await self.db.execute(build_user_search_query(query, limit, trigram_search))
+        rows = [dict(zip(USER_LIST_FIELDS, row)) for row in result.all()]
+        search_cache.set(key, rows, generation)
+        return rows
+
+
+
+    async def get_user_by_id(self, user_id: int):
+        """Returns a single user by ID."""
+        result = await self.db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
+
+
+
+    async def get_user_version(self, user_id: int) -> int:
+        """Returns only a user's version, for conditional requests."""
+        result = await self.db.execute(select(User.version).where(User.id == user_id))
+        version = result.scalar_one_or_none()
+        if version is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return version
+
+
+
+    async def update_user(self, user_id: int, update_data: dict):
+        """Updates a user's username, email or role."""
+        result = await self.db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if not user:
+            return {"error": "User not found", "status_code": 404}
+
+        old_email, old_role = user.email, UserRole(user.role).value
+        # Sessions are keyed by email and authorize by role; changing either ends them
+        ends_sessions = (
+            update_data.get("email", old_email) != old_email
+            or update_data.get("role", old_role) != old_role
+        )
+        try:
+            if ends_sessions:
+                await session_store.revoke_user(self.db, old_email)
+            session_cache.invalidate_user(old_email)
+            for field, value in update_data.items():
+                setattr(user, field, value)
+            await self.db.commit()
+            # Again once committed: a lookup in between may have cached the old row
+            session_cache.invalidate_user(old_email)
+            search_cache.invalidate()
+            return {"message": "User updated successfully", "user": user, "status_code": 200}
+
+        except StaleDataError:
+            await self.db.rollback()
+            return {"error": "User was modified concurrently, please retry", "status_code": 409}
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            return {"error": f"Database error: {str(e)}", "status_code": 500}
+
+
+
+    async def delete_user(self, user_id: int):
+        """Deletes a user and, through the cascade, their sessions."""
+        result = await self.db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if not user:
+            return {"error": "User not found", "status_code": 404}
+
+        email = user.email
+        try:
+            await session_store.revoke_user(self.db, email)
+            session_cache.invalidate_user(email)
+            await self.db.delete(user)
+            await self.db.commit()
+            session_cache.invalidate_user(email)
+            search_cache.invalidate()
+            return {"message": "User deleted successfully", "status_code": 200}
+
+        except StaleDataError:
+            await self.db.rollback()
+            return {"error": "User was modified concurrently, please retry", "status_code": 409}
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            return {"error": f"Database error: {str(e)}", "status_code": 500}
+
+
+
+    async def change_password(self, user_id: int, old_password: str, new_password: str, current_user: AuthPrincipal):
+        """
+        Changes a user's password.
+        An empty old_password skips the check (admin reset).
+        """
+        result = await self.db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if not user:
+            return {"error": "User not found", "status_code": 404}
+
+        if old_password and not await password_hasher.verify(old_password, user.password_hash):
+            return {"error": "Old password is incorrect", "status_code": 400}
+
+        try:
+            user.password_hash = await password_hasher.hash(new_password)
+            await self.db.commit()
+            await session_store.revoke_user(self.db, user.email)
+            session_cache.invalidate_user(user.email)
+            await audit_log.record("password_change" if old_password else "admin_password_change", user.email)
+            return {"message": "Password changed successfully", "status_code": 200}
+
+        except StaleDataError:
+            await self.db.rollback()
+            return {"error": "User was modified concurrently, please retry", "status_code": 409}
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            return {"error": f"Database error: {str(e)}", "status_code": 500}
+
 
 
     async def get_current_user(session_id: str = Cookie(None), db: AsyncSession=Depends(get_db)):
@@ -159,10 +574,10 @@ class UserSerivice:
 
             user_service = UserSerivice(db)
             try:
-                _, user = await user_service.validate_session(session_id)
-                if not user:
-                    raise HTTPException(status_code=404, detail="User not found")
-                return user
+                return await user_service.validate_session(session_id)
             except Exception:
                 raise HTTPException(status_code=500, detail="Failed to validate session")
-            
+
+
+# Routes and dependencies import the service under this name.
+UserService = UserSerivice
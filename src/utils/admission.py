@@ -0,0 +1,156 @@
+"""
+Admission control: a bounded concurrency limit and queue per route class,
+and a per-request deadline that the database honours.
+
+Requests beyond a class's limit wait in its queue for at most the time left
+before their deadline; when the queue is full or the wait runs out they get
+a 503 with Retry-After straight away instead of piling up on the connection
+pool. The deadline is carried in a context variable and applied to every
+transaction the request opens as `SET LOCAL statement_timeout`.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.config.settings import Settings
+from src.utils.metrics import admission_queue_wait_seconds, admission_requests
+
+settings = Settings()
+
+# Monotonic-clock deadline and route class of the current request
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+request_route_class: ContextVar[str] = ContextVar("request_route_class", default="none")
+
+
+def remaining_seconds() -> Optional[float]:
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _shed(route_class: str, outcome: str, detail: str, retry_after: float) -> HTTPException:
+    admission_requests.inc(1, route_class, outcome)
+    return HTTPException(
+        status_code=503,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionLimiter:
+    """
+    At most `limit` requests of one class run at once and at most
+    `max_queue` more wait, first come first served. A released slot is
+    handed straight to the oldest waiter.
+    """
+
+    def __init__(self, route_class: str, limit: int, max_queue: int):
+        self.route_class = route_class
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self, timeout: float) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            admission_queue_wait_seconds.observe(0.0, self.route_class)
+            return
+        if len(self._waiters) >= self.max_queue or timeout <= 0:
+            raise _shed(self.route_class, "shed_queue_full", "Server busy, please retry", 1)
+
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            raise _shed(self.route_class, "shed_timeout", "Server busy, please retry", timeout)
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as we were cancelled
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        admission_queue_wait_seconds.observe(time.perf_counter() - start, self.route_class)
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {"active": self.active, "queued": len(self._waiters), "limit": self.limit}
+
+
+limiters: Dict[str, AdmissionLimiter] = {
+    "login": AdmissionLimiter("login", settings.ADMISSION_LOGIN_LIMIT, settings.ADMISSION_LOGIN_QUEUE),
+    "read": AdmissionLimiter("read", settings.ADMISSION_READ_LIMIT, settings.ADMISSION_READ_QUEUE),
+    "write": AdmissionLimiter("write", settings.ADMISSION_WRITE_LIMIT, settings.ADMISSION_WRITE_QUEUE),
+}
+
+
+def admission(route_class: str) -> Callable:
+    """
+    Route dependency: sets the request deadline and holds a slot of the
+    route class while the endpoint runs. Declare it in the route's
+    `dependencies` so it is resolved before the DB session and auth.
+    A streaming response body is sent after the slot is released, so it
+    must clear `request_deadline` before it touches the database.
+    """
+    limiter = limiters[route_class]
+    deadline_seconds = settings.REQUEST_DEADLINE_SECONDS
+
+    async def admit():
+        if not settings.ADMISSION_ENABLED:
+            yield
+            return
+        request_deadline.set(time.monotonic() + deadline_seconds)
+        request_route_class.set(route_class)
+        await limiter.acquire(deadline_seconds)
+        admission_requests.inc(1, route_class, "served")
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return admit
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    """Bounds every statement of a request's transaction by its remaining time."""
+    remaining = remaining_seconds()
+    if remaining is None:
+        return
+    if remaining <= 0:
+        raise deadline_exceeded()
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(int(remaining * 1000), 1)}")
+
+
+def deadline_exceeded() -> HTTPException:
+    return _shed(request_route_class.get(), "deadline_exceeded", "Request deadline exceeded", 1)
+
+
+def is_statement_timeout(exc: BaseException) -> bool:
+    """True for Postgres' 'canceling statement due to statement timeout' (SQLSTATE 57014)."""
+    for error in (getattr(exc, "orig", None), getattr(exc, "__cause__", None), exc):
+        if error is not None and (getattr(error, "sqlstate", None) or getattr(error, "pgcode", None)) == "57014":
+            return True
+    return "statement timeout" in str(exc)
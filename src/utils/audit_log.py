@@ -0,0 +1,245 @@
+"""
+Authentication audit trail, written off the request path.
+
+Handlers call `audit_log.record()`, which only appends a row to a bounded
+in-memory buffer. A background writer drains the buffer in batches of up to
+AUDIT_BATCH_SIZE rows, at the latest every AUDIT_FLUSH_INTERVAL_MS, with one
+COPY (Postgres) or one multi-row INSERT per batch, so auditing costs one
+commit per batch instead of one per login. What is still buffered at
+shutdown is written by `close()` in the app lifespan.
+
+When the writer cannot keep up and the buffer is full, AUDIT_OVERFLOW_POLICY
+decides what gives:
+    drop_newest  the new event is dropped; requests never wait (default)
+    drop_oldest  the oldest buffered event makes room for the new one
+    block        the request waits up to AUDIT_BLOCK_TIMEOUT_MS for room,
+                 then the new event is dropped
+Dropped events are counted in stats() and logged once per overload episode.
+"""
+import asyncio
+import contextvars
+import hashlib
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Deque, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config.database import engine
+from src.config.logging_config import request_id_var
+from src.config.settings import Settings
+from src.models.audit import AuditEvent
+
+settings = Settings()
+
+# Set by the HTTP middleware and the auth dependency
+client_ip_var: ContextVar[Optional[str]] = ContextVar("audit_client_ip", default=None)
+actor_var: ContextVar[Optional[str]] = ContextVar("audit_actor", default=None)
+
+AUDIT_COLUMNS = ("occurred_at", "event", "user_mail", "actor_mail", "session_ref", "client_ip", "request_id")
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+
+def session_ref(session_id: str) -> str:
+    """Non-secret reference to a session, matching the session listing."""
+    return hashlib.sha256(session_id.encode()).hexdigest()[:16]
+
+
+class AuditLog:
+    def __init__(
+        self,
+        db_engine: AsyncEngine,
+        max_buffer: int,
+        batch_size: int,
+        flush_interval_seconds: float,
+        policy: str = "drop_newest",
+        block_timeout_seconds: float = 0.1,
+        use_copy: bool = True,
+        enabled: bool = True,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy {policy!r}, expected one of {', '.join(OVERFLOW_POLICIES)}")
+        self.db_engine = db_engine
+        self.max_buffer = max(max_buffer, 1)
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.policy = policy
+        self.block_timeout_seconds = block_timeout_seconds
+        self.use_copy = use_copy
+        self.enabled = enabled
+        self._buffer: Deque[Tuple] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._has_items: Optional[asyncio.Event] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._closing = False
+        self._overloaded = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.flush_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def record(
+        self,
+        event: str,
+        user_mail: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Buffers one event; the acting user, client IP and request ID come
+        from the request context. Returns False if the event was dropped.
+        """
+        if not self.enabled:
+            return False
+        row = (
+            datetime.now(timezone.utc),
+            event,
+            user_mail,
+            actor_var.get(),
+            session_ref(session_id) if session_id else None,
+            client_ip_var.get(),
+            request_id_var.get(),
+        )
+
+        if len(self._buffer) >= self.max_buffer:
+            if self.policy == "drop_oldest":
+                self._buffer.popleft()
+                self._drop(1)
+            elif self.policy == "block" and self.running:
+                try:
+                    await asyncio.wait_for(self._wait_for_space(), self.block_timeout_seconds)
+                except asyncio.TimeoutError:
+                    self._drop(1)
+                    return False
+            else:
+                self._drop(1)
+                return False
+
+        self._buffer.append(row)
+        self.recorded += 1
+        if self._has_items is not None:
+            self._has_items.set()
+            if len(self._buffer) >= self.batch_size:
+                self._batch_ready.set()
+        return True
+
+    async def _wait_for_space(self) -> None:
+        while len(self._buffer) >= self.max_buffer:
+            self._space.clear()
+            await self._space.wait()
+
+    def _drop(self, count: int) -> None:
+        self.dropped += count
+        if not self._overloaded:
+            self._overloaded = True
+            logging.warning(f"Audit buffer full ({self.max_buffer} events), dropping events ({self.policy})")
+
+    async def _write(self, rows: List[Tuple]) -> None:
+        async with self.db_engine.connect() as conn:
+            if self.use_copy and conn.dialect.name == "postgresql":
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    AuditEvent.__tablename__, records=rows, columns=AUDIT_COLUMNS
+                )
+            else:
+                await conn.execute(insert(AuditEvent).values([dict(zip(AUDIT_COLUMNS, row)) for row in rows]))
+                await conn.commit()
+
+    async def flush_once(self) -> int:
+        """Writes up to one batch of buffered events. Returns how many were written."""
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        if not self._buffer:
+            self._has_items.clear()
+        if len(self._buffer) < self.batch_size:
+            self._batch_ready.clear()
+        self._space.set()
+        if not batch:
+            return 0
+
+        start = time.perf_counter()
+        try:
+            await self._write(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logging.error(f"Writing {len(batch)} audit events failed: {e}")
+            return 0
+        finally:
+            self.batches += 1
+            self.flush_seconds += time.perf_counter() - start
+
+        self.written += len(batch)
+        if self._overloaded and len(self._buffer) < self.max_buffer // 2:
+            self._overloaded = False
+            logging.info("Audit buffer recovered")
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_items.wait()
+            if not self._closing and len(self._buffer) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            pending = len(self._buffer)
+            written = await self.flush_once()
+            if self._closing and not self._buffer:
+                return
+            if pending and not written and not self._closing:
+                # The database is failing; don't spin on a full buffer
+                await asyncio.sleep(self.flush_interval_seconds)
+
+    def start(self) -> None:
+        if not self.enabled or self.running:
+            return
+        self._has_items = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._space = asyncio.Event()
+        if self._buffer:
+            self._has_items.set()
+        # An empty context keeps request state (deadline, metrics) out of the writer
+        self._task = contextvars.Context().run(asyncio.create_task, self._run(), name="audit-writer")
+
+    async def close(self) -> None:
+        """Writes everything still buffered, then stops the writer."""
+        if not self.running:
+            return
+        self._closing = True
+        self._has_items.set()
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+        self._closing = False
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "flush_seconds_total": self.flush_seconds,
+        }
+
+
+audit_log = AuditLog(
+    engine,
+    max_buffer=settings.AUDIT_BUFFER_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval_seconds=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    policy=settings.AUDIT_OVERFLOW_POLICY,
+    block_timeout_seconds=settings.AUDIT_BLOCK_TIMEOUT_MS / 1000,
+    use_copy=settings.AUDIT_USE_COPY,
+    enabled=settings.AUDIT_LOG_ENABLED,
+)
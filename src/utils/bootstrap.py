@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config.database import AsyncSessionLocal, engine
+from src.config.settings import Settings
+from src.utils.init_super_admin import create_super_admin
+from src.utils.migrate import create_schema
+
+settings = Settings()
+
+# Postgres advisory lock key serializing bootstrap across workers and hosts
+BOOTSTRAP_LOCK_KEY = 7_214_530_190
+
+
+async def run_bootstrap(db_engine: AsyncEngine = engine) -> None:
+    """
+    Creates the schema (when DB_AUTO_CREATE_SCHEMA is set) and the super admin.
+
+    On Postgres this runs under a session advisory lock, so concurrent
+    starters queue up behind the first one instead of racing on DDL; both
+    steps are idempotent, so whoever goes second finds nothing to do.
+    """
+    async with db_engine.connect() as lock_conn:
+        locked = lock_conn.dialect.name == "postgresql"
+        if locked:
+            await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": BOOTSTRAP_LOCK_KEY})
+        try:
+            if settings.DB_AUTO_CREATE_SCHEMA:
+                await create_schema(db_engine)
+            async with AsyncSessionLocal() as db:
+                await create_super_admin(db)
+        finally:
+            if locked:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": BOOTSTRAP_LOCK_KEY})
+    logging.info("Bootstrap complete.")
+
+
+async def main():
+    try:
+        await run_bootstrap()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+
+class GroupCommitter:
+    """
+    Turns concurrent single-item writes into batched ones.
+
+    Callers submit() an item and wait for the batch holding it to be
+    written. A background flusher takes whatever is pending once the
+    first item has waited window_seconds (or max_batch items are pending)
+    and hands the batch to `flush`, which returns one result per item; a
+    result that is an exception instance fails just that caller. If `flush`
+    raises, every caller in the batch fails with its exception. While a batch is being written
+    the next one accumulates, so commits per second stay flat as load grows.
+    """
+
+    def __init__(self, flush: Callable[[List[Any]], Awaitable[Any]], window_seconds: float, max_batch: int):
+        self.flush = flush
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._has_items: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._closing = False
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.flush_seconds = 0.0
+        self.failures = 0
+
+    def _ensure_flusher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            if self._loop is not loop:
+                # Left over from a loop that has since closed; nobody can await them
+                self._pending = []
+            self._loop = loop
+            self._has_items = asyncio.Event()
+            self._full = asyncio.Event()
+            # Start from an empty context so the flusher doesn't inherit the
+            # first caller's request state (deadline, request metrics)
+            self._task = contextvars.Context().run(loop.create_task, self._run())
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_flusher()
+        future = self._loop.create_future()
+        self._pending.append((item, future))
+        self._has_items.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_items.wait()
+            if not self._closing and len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush_pending()
+            if self._closing and not self._pending:
+                return
+
+    async def _flush_pending(self) -> None:
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if not self._pending:
+            self._has_items.clear()
+        if len(self._pending) < self.max_batch:
+            self._full.clear()
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        try:
+            result = await self.flush([item for item, _ in batch])
+        except Exception as e:
+            self.failures += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), item_result in zip(batch, result):
+                if future.done():
+                    continue
+                if isinstance(item_result, Exception):
+                    future.set_exception(item_result)
+                else:
+                    future.set_result(item_result)
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.flush_seconds += time.perf_counter() - start
+
+    async def close(self) -> None:
+        """Writes whatever is still pending and stops the flusher."""
+        if self._task is not None and not self._task.done() and self._loop is asyncio.get_running_loop():
+            self._closing = True
+            self._has_items.set()
+            self._full.set()
+            await self._task
+        self._task = None
+        self._closing = False
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "largest_batch": self.largest_batch,
+            "pending": len(self._pending),
+            "flush_seconds_total": self.flush_seconds,
+            "failures": self.failures,
+        }
@@ -1,26 +1,41 @@
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.database import insert
 from src.config.settings import Settings
 from src.models.user import User
+from src.utils.password_hasher import password_hasher
 import logging
 
 settings = Settings()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def create_super_admin(db:Session):
-    existing_user=db.query(User).filter(User.email==settings.SUPER_ADMIN_EMAIL).first()
-    if not existing_user:
-        hashed_password = pwd_context.hash(settings.SUPER_ADMIN_PASSWORD)
-        super_admin = User(
+async def create_super_admin(db: AsyncSession):
+    """
+    Creates the super admin if missing. An indexed existence check runs
+    first so that the usual boot, with the admin already there, skips the
+    bcrypt hash; the insert stays idempotent for workers racing on a fresh DB.
+    """
+    if not settings.SUPER_ADMIN_EMAIL or not settings.SUPER_ADMIN_PASSWORD:
+        logging.warning("SUPER_ADMIN_EMAIL/SUPER_ADMIN_PASSWORD not set, skipping super admin bootstrap.")
+        return
+
+    result = await db.execute(select(User.id).where(User.email == settings.SUPER_ADMIN_EMAIL))
+    if result.scalar_one_or_none() is not None:
+        return
+
+    hashed_password = await password_hasher.hash(settings.SUPER_ADMIN_PASSWORD)
+    stmt = (
+        insert(User)
+        .values(
             username="SuperAdmin",
             email=settings.SUPER_ADMIN_EMAIL,
             password_hash=hashed_password,
-            role="superadmin"  # Assuming 'superadmin' is a valid UserRole
+            role="superadmin",
         )
-        db.add(super_admin)
-        db.commit()
-        db.refresh(super_admin)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id)
+    )
+    result = await db.execute(stmt)
+    created = result.scalar_one_or_none()
+    await db.commit()
+    if created is not None:
         logging.info("Super admin created successfully.")
-        
-
@@ -0,0 +1,97 @@
+import asyncio
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class KVError(Exception):
+    """Error reply from the key-value server."""
+
+
+def _encode(*args) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by key-value server")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise KVError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(count)]
+    raise KVError(f"Unexpected reply: {line!r}")
+
+
+class KVClient:
+    """
+    Minimal asyncio client for Redis-protocol (RESP2) key-value servers.
+
+    Works against Redis/Valkey or the local stand-in in src.utils.kv_server.
+    Connections are opened lazily and pooled, one command in flight per
+    connection.
+    """
+
+    def __init__(self, url: str, pool_size: int = 10):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.pool_size = pool_size
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(_encode("AUTH", self.password))
+            await writer.drain()
+            await _read_reply(reader)
+        if self.db:
+            writer.write(_encode("SELECT", self.db))
+            await writer.drain()
+            await _read_reply(reader)
+        return reader, writer
+
+    async def execute(self, *args):
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            reader, writer = conn
+            try:
+                writer.write(_encode(*args))
+                await writer.drain()
+                reply = await _read_reply(reader)
+            except KVError:
+                self._idle.append(conn)
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            self._idle.append(conn)
+            return reply
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.execute("GET", key)
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
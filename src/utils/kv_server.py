@@ -0,0 +1,190 @@
+"""
+Local stand-in for a Redis-style key-value server.
+
+Implements the small RESP2 command subset the KV session store and the
+shared rate-limit backend use, so those backends can be run and exercised
+without a Redis install:
+
+    python -m src.utils.kv_server --port 6379
+
+Data lives in memory in this process only.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Set, Union
+
+from src.utils.kv_client import _encode
+
+
+class _Store:
+    def __init__(self):
+        self.data: Dict[str, Union[str, Set[str]]] = {}
+        self.expires: Dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def get(self, key: str):
+        return self.data[key] if self._alive(key) else None
+
+    def expire(self, key: str, ms: Optional[int]) -> bool:
+        if not self._alive(key):
+            return False
+        if ms is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = time.monotonic() + ms / 1000
+        return True
+
+    def delete(self, key: str) -> bool:
+        alive = self._alive(key)
+        self.data.pop(key, None)
+        self.expires.pop(key, None)
+        return alive
+
+
+def _ttl_ms(args, index: int) -> Optional[int]:
+    """Parses trailing EX/PX options starting at args[index]."""
+    ttl = None
+    while index < len(args):
+        option = args[index].upper()
+        if option == "EX":
+            ttl = int(args[index + 1]) * 1000
+            index += 2
+        elif option == "PX":
+            ttl = int(args[index + 1])
+            index += 2
+        else:
+            index += 1
+    return ttl
+
+
+def _bulk(value: Optional[str]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    data = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+def execute(store: _Store, args) -> bytes:
+    command = args[0].upper()
+
+    if command == "PING":
+        return b"+PONG\r\n"
+    if command in ("SELECT", "AUTH"):
+        return b"+OK\r\n"
+    if command == "GET":
+        return _bulk(store.get(args[1]))
+    if command == "GETDEL":
+        value = store.get(args[1])
+        store.delete(args[1])
+        return _bulk(value)
+    if command == "GETEX":
+        value = store.get(args[1])
+        ttl = _ttl_ms(args, 2)
+        if value is not None and ttl is not None:
+            store.expire(args[1], ttl)
+        return _bulk(value)
+    if command == "SET":
+        nx = any(arg.upper() == "NX" for arg in args[3:])
+        if nx and store._alive(args[1]):
+            return b"$-1\r\n"
+        store.data[args[1]] = args[2]
+        store.expires.pop(args[1], None)
+        ttl = _ttl_ms(args, 3)
+        if ttl is not None:
+            store.expire(args[1], ttl)
+        return b"+OK\r\n"
+    if command == "DEL":
+        return b":%d\r\n" % sum(store.delete(key) for key in args[1:])
+    if command == "RENAME":
+        if not store._alive(args[1]):
+            return b"-ERR no such key\r\n"
+        value, deadline = store.data.pop(args[1]), store.expires.pop(args[1], None)
+        store.delete(args[2])
+        store.data[args[2]] = value
+        if deadline is not None:
+            store.expires[args[2]] = deadline
+        return b"+OK\r\n"
+    if command in ("EXPIRE", "PEXPIRE"):
+        ms = int(args[2]) * (1000 if command == "EXPIRE" else 1)
+        return b":%d\r\n" % store.expire(args[1], ms)
+    if command == "PTTL":
+        if not store._alive(args[1]):
+            return b":-2\r\n"
+        deadline = store.expires.get(args[1])
+        return b":%d\r\n" % (-1 if deadline is None else int((deadline - time.monotonic()) * 1000))
+    if command in ("INCR", "INCRBY"):
+        current = int(store.get(args[1]) or 0)
+        current += int(args[2]) if command == "INCRBY" else 1
+        store.data[args[1]] = str(current)
+        return b":%d\r\n" % current
+    if command == "SADD":
+        members = store.get(args[1])
+        if members is None:
+            members = store.data[args[1]] = set()
+        before = len(members)
+        members.update(args[2:])
+        return b":%d\r\n" % (len(members) - before)
+    if command == "SREM":
+        members = store.get(args[1]) or set()
+        removed = sum(1 for m in args[2:] if m in members)
+        members.difference_update(args[2:])
+        return b":%d\r\n" % removed
+    if command == "SMEMBERS":
+        return _encode(*sorted(store.get(args[1]) or ()))
+    return b"-ERR unknown command '%s'\r\n" % command.encode()
+
+
+async def _read_command(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.decode().split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        length = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2].decode())
+    return args
+
+
+async def serve(host: str, port: int):
+    store = _Store()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                try:
+                    writer.write(execute(store, args))
+                except (IndexError, ValueError):
+                    writer.write(b"-ERR wrong arguments\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logging.info(f"KV stand-in listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for a Redis-style KV server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
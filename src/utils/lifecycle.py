@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import signal
+import time
+
+
+class RequestTracker:
+    """
+    Per-worker readiness and in-flight request accounting.
+
+    The worker is ready once warm-up finished and stops being ready as soon
+    as SIGTERM arrives, so a load balancer polling /health/ready drains it
+    while in-flight requests complete.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.completed = 0
+        self.ready = False
+        self.draining = False
+
+    def begin(self) -> None:
+        self.in_flight += 1
+
+    def end(self) -> None:
+        self.in_flight -= 1
+        self.completed += 1
+
+    def install_drain_handler(self, delay_seconds: float) -> None:
+        """
+        Wraps the server's SIGTERM/SIGINT handlers: mark the worker as
+        draining at once, then hand the signal on after delay_seconds.
+        Must run inside the worker's event loop, after the server installed
+        its own handlers (i.e. during lifespan startup).
+        """
+        loop = asyncio.get_running_loop()
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                if not self.draining:
+                    self.draining = True
+                    logging.info("Draining: %d requests in flight", self.in_flight)
+                if delay_seconds > 0:
+                    loop.call_soon_threadsafe(loop.call_later, delay_seconds, previous, signum, frame)
+                else:
+                    previous(signum, frame)
+
+            signal.signal(sig, handler)
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Waits up to timeout seconds for in-flight requests; True if none remain."""
+        deadline = time.monotonic() + timeout
+        while self.in_flight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self.in_flight:
+            logging.warning("Shutting down with %d requests still in flight", self.in_flight)
+        return self.in_flight == 0
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "ready": int(self.ready and not self.draining),
+            "draining": int(self.draining),
+        }
+
+
+request_tracker = RequestTracker()
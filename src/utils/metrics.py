@@ -0,0 +1,212 @@
+"""
+Minimal Prometheus-style metrics: counters, gauges and histograms rendered
+in the text exposition format on /metrics.
+
+Per-request figures (DB query count and time, pool wait) are accumulated on
+a RequestMetrics object held in a context variable, which SQLAlchemy's
+greenlets inherit, so engine events can attribute work to the request that
+caused it.
+"""
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge whose samples are read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], Iterable[Tuple[LabelValues, float]]], labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+            for labels, value in self.collect()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def snapshot(self, *labels: str) -> Tuple[int, float]:
+        """Returns (count, sum) observed so far for one label set."""
+        series = self._series.get(labels)
+        if series is None:
+            return 0, 0.0
+        return sum(series[0]), series[1][0]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            cumulative += counts[-1]
+            bucket_labels = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total[0]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name: str, documentation: str, collect, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, collect, labels))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ("route",), buckets=COUNT_BUCKETS
+)
+db_seconds_per_request = registry.histogram(
+    "db_query_seconds_per_request", "Time spent in SQL statements per HTTP request", ("route",)
+)
+db_query_seconds = registry.histogram("db_query_duration_seconds", "SQL statement latency")
+db_pool_wait_seconds = registry.histogram("db_pool_wait_seconds", "Time waiting for a pooled connection")
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "Time spent inside bcrypt", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+password_queue_wait_seconds = registry.histogram(
+    "password_hash_queue_wait_seconds", "Time waiting for a hashing worker", ("operation",)
+)
+auth_lookups = registry.counter("auth_lookups_total", "Session validations by where they were answered", ("source",))
+db_session_seconds = registry.histogram("db_session_seconds", "How long a request holds a DB session")
+admission_requests = registry.counter(
+    "admission_requests_total", "Requests served or shed by admission control", ("route_class", "outcome")
+)
+admission_queue_wait_seconds = registry.histogram(
+    "admission_queue_wait_seconds", "Time queued for an admission slot", ("route_class",)
+)
+
+
+class RequestMetrics:
+    __slots__ = ("db_queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request_metrics", default=None)
+
+
+def record_query(seconds: float) -> None:
+    db_query_seconds.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += seconds
+
+
+def record_pool_wait(seconds: float) -> None:
+    db_pool_wait_seconds.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def install_query_metrics(engine) -> None:
+    """Times every statement executed on an (async) engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        record_query(time.perf_counter() - conn.info["query_start"].pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            record_query(time.perf_counter() - conn.info["query_start"].pop())
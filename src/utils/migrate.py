@@ -0,0 +1,77 @@
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config.database import Base, engine
+from src.config.settings import Settings
+import src.models.user  # noqa: F401  (registers the tables on Base.metadata)
+import src.models.audit  # noqa: F401
+from src.utils.session_partitions import create_partitioned_sessions_table, ensure_session_partitions
+
+settings = Settings()
+
+
+# Columns and indexes added after the first release; create_all() leaves
+# existing tables alone.
+SCHEMA_UPGRADES = (
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now()",
+    # The reaper's expires_at < now() batches; tables created before it existed lack it
+    "CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at)",
+    "CREATE INDEX IF NOT EXISTS ix_sessions_user_mail_created_at ON sessions (user_mail, created_at)",
+    # Prefix search on lower(username/email) LIKE 'q%'
+    "CREATE INDEX IF NOT EXISTS ix_users_username_prefix ON users (lower(username) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_prefix ON users (lower(email) text_pattern_ops)",
+)
+
+# Substring and similarity search; needs the pg_trgm extension
+TRIGRAM_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (lower(username) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (lower(email) gin_trgm_ops)",
+)
+
+
+async def create_trigram_indexes(conn) -> bool:
+    """
+    Creates the pg_trgm search indexes. Without the privilege to create the
+    extension, search still works, with substring matches scanning the table.
+    """
+    try:
+        async with conn.begin_nested():
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        logging.warning(f"pg_trgm unavailable, skipping trigram search indexes: {e}")
+        return False
+    for statement in TRIGRAM_INDEXES:
+        await conn.execute(text(statement))
+    return True
+
+
+async def create_schema(db_engine: AsyncEngine = engine):
+    """Creates any missing tables, columns and indexes on the async engine."""
+    async with db_engine.begin() as conn:
+        if settings.SESSION_PARTITIONING:
+            tables = [t for t in Base.metadata.sorted_tables if t.name != "sessions"]
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+            await create_partitioned_sessions_table(conn)
+            await ensure_session_partitions(conn)
+        else:
+            await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
+            await create_trigram_indexes(conn)
+    logging.info("Database schema is up to date.")
+
+
+async def main():
+    try:
+        await create_schema()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import logging
+import secrets
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from src.config.settings import Settings
+from src.utils.metrics import password_hash_seconds, password_queue_wait_seconds
+
+settings = Settings()
+
+# Schemes that can still verify stored hashes after the configured scheme changes.
+KNOWN_SCHEMES = ("argon2", "bcrypt", "scrypt")
+
+
+def build_crypt_context(scheme: str, cost: Optional[int] = None) -> CryptContext:
+    """
+    Builds the password hashing context from Settings.
+
+    The configured scheme hashes new passwords; the other known schemes are
+    kept for verification only and marked deprecated. The cost is pinned as
+    both the minimum and maximum desired value, so hashes made with any
+    other cost (higher or lower) report needs_update and get rehashed on
+    the next successful login.
+
+    Args:
+        scheme: "bcrypt", "argon2" or "scrypt".
+        cost: Overrides the configured cost (bcrypt rounds, argon2 time
+            cost, scrypt log2(N)); used by calibration.
+    """
+    if scheme not in KNOWN_SCHEMES:
+        raise ValueError(f"Unsupported PASSWORD_HASH_SCHEME '{scheme}' (expected one of {', '.join(KNOWN_SCHEMES)})")
+
+    options = {}
+    if scheme == "bcrypt":
+        rounds = cost or settings.BCRYPT_ROUNDS
+    elif scheme == "argon2":
+        rounds = cost or settings.ARGON2_TIME_COST
+        options["argon2__memory_cost"] = settings.ARGON2_MEMORY_COST_KIB
+        options["argon2__parallelism"] = settings.ARGON2_PARALLELISM
+    else:
+        rounds = cost or settings.SCRYPT_LOG2_N
+        memory_mb = 128 * settings.SCRYPT_BLOCK_SIZE * (2 ** rounds) / (1024 * 1024)
+        if memory_mb > settings.SCRYPT_MAX_MEMORY_MB:
+            raise ValueError(
+                f"scrypt with log2(N)={rounds} and r={settings.SCRYPT_BLOCK_SIZE} needs {memory_mb:.0f} MB, "
+                f"above SCRYPT_MAX_MEMORY_MB={settings.SCRYPT_MAX_MEMORY_MB}"
+            )
+        options["scrypt__block_size"] = settings.SCRYPT_BLOCK_SIZE
+        options["scrypt__parallelism"] = settings.SCRYPT_PARALLELISM
+
+    options[f"{scheme}__default_rounds"] = rounds
+    options[f"{scheme}__min_rounds"] = rounds
+    options[f"{scheme}__max_rounds"] = rounds
+
+    schemes = [scheme] + [s for s in KNOWN_SCHEMES if s != scheme and (s != "argon2" or _argon2_available())]
+    return CryptContext(schemes=schemes, default=scheme, deprecated="auto", **options)
+
+
+def _argon2_available() -> bool:
+    from passlib.hash import argon2
+
+    return argon2.has_backend()
+
+
+if settings.PASSWORD_HASH_SCHEME == "argon2" and not _argon2_available():
+    raise RuntimeError("PASSWORD_HASH_SCHEME=argon2 requires the argon2-cffi package")
+
+pwd_context = build_crypt_context(settings.PASSWORD_HASH_SCHEME)
+
+
+def _timed_hash(password: str) -> Tuple[str, float]:
+    start = time.perf_counter()
+    hashed = pwd_context.hash(password)
+    return hashed, time.perf_counter() - start
+
+
+def _timed_verify(password: str, hashed: str) -> Tuple[bool, float]:
+    start = time.perf_counter()
+    ok = pwd_context.verify(password, hashed)
+    return ok, time.perf_counter() - start
+
+
+def _timed_verify_and_update(password: str, hashed: str) -> Tuple[Tuple[bool, Optional[str]], float]:
+    start = time.perf_counter()
+    result = pwd_context.verify_and_update(password, hashed)
+    return result, time.perf_counter() - start
+
+
+class PasswordHasher:
+    """
+    Runs password hash/verify on a bounded worker pool instead of the event loop.
+
+    At most max_workers calls run at once and at most max_queue more may wait
+    for a worker; beyond that callers get a 503 straight away rather than
+    piling up behind the pool.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, use_processes: bool = False):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._dummy_hash: Optional[str] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", _timed_hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit("verify", _timed_verify, password, hashed)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifies a password and, if the stored hash uses an outdated scheme
+        or cost, also returns a replacement hash (otherwise None).
+        """
+        return await self._submit("verify", _timed_verify_and_update, password, hashed)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hashes a batch in parallel for bulk imports.
+        At most max_workers hashes are outstanding at a time, so a large
+        batch uses the pool without filling the queue that logins rely on.
+        """
+        limit = asyncio.Semaphore(self.max_workers)
+
+        async def one(password: str) -> str:
+            async with limit:
+                return await self._submit("hash", _timed_hash, password, admit=False)
+
+        return list(await asyncio.gather(*(one(p) for p in passwords)))
+
+    async def dummy_verify(self, password: str) -> bool:
+        """
+        Runs a verify against a throwaway hash so that unknown users cost the
+        same as a wrong password and cannot be told apart by timing.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        await self.verify(password, self._dummy_hash)
+        return False
+
+    async def warm_up(self) -> None:
+        """
+        Starts every pool worker and prepares the dummy hash, so the first
+        logins don't pay for thread/process start-up.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        await asyncio.gather(*(
+            self._submit("verify", _timed_verify, "warm-up", self._dummy_hash, admit=False)
+            for _ in range(self.max_workers)
+        ))
+
+    async def _submit(self, operation: str, fn, *args, admit: bool = True):
+        if admit and self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_time = await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+        wait_time = max(time.perf_counter() - start - hash_time, 0.0)
+        self.completed += 1
+        self.hash_seconds += hash_time
+        self.queue_wait_seconds += wait_time
+        self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, wait_time)
+        password_hash_seconds.observe(hash_time, operation)
+        password_queue_wait_seconds.observe(wait_time, operation)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "hash_seconds_total": self.hash_seconds,
+            "queue_wait_seconds_total": self.queue_wait_seconds,
+            "queue_wait_seconds_max": self.max_queue_wait_seconds,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    use_processes=settings.PASSWORD_HASH_POOL == "process",
+)
+
+
+def calibrate(scheme: str, target_ms: float, samples: int = 3) -> int:
+    """
+    Finds the highest cost whose verify time on this host stays within
+    target_ms. Every cost step roughly doubles (bcrypt, scrypt) or adds a
+    pass (argon2), so costs are tried upwards from a cheap starting point.
+
+    That starting point is also the floor: bcrypt 8, argon2 1, scrypt 12 are
+    returned even if they miss the target, since anything weaker is not a
+    safe password hash. A warning is logged when that happens.
+    """
+    floor = cost = {"bcrypt": 8, "argon2": 1, "scrypt": 12}[scheme]
+    best = cost
+    while True:
+        try:
+            context = build_crypt_context(scheme, cost)
+        except ValueError:
+            break  # scrypt memory limit reached
+        hashed = context.hash("calibration-password")
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            context.verify("calibration-password", hashed)
+            timings.append((time.perf_counter() - start) * 1000)
+        elapsed = sorted(timings)[len(timings) // 2]
+        print(f"{scheme} cost {cost}: verify {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            if cost == floor:
+                logging.warning(
+                    "%s at its minimum cost %d already takes %.1f ms, over the %.0f ms target; "
+                    "using %d anyway. Raise the target or add CPU.",
+                    scheme, floor, elapsed, target_ms, floor,
+                )
+            break
+        best = cost
+        cost += 1
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick a password hash cost for a target verify latency")
+    parser.add_argument("command", choices=("calibrate",))
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--scheme", choices=KNOWN_SCHEMES, default=settings.PASSWORD_HASH_SCHEME)
+    args = parser.parse_args()
+
+    best = calibrate(args.scheme, args.target_ms)
+    setting = {"bcrypt": "BCRYPT_ROUNDS", "argon2": "ARGON2_TIME_COST", "scrypt": "SCRYPT_LOG2_N"}[args.scheme]
+    print(f"\nPASSWORD_HASH_SCHEME={args.scheme}\n{setting}={best}")
@@ -0,0 +1,122 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Tuple
+
+from fastapi import HTTPException
+
+from src.config.settings import Settings
+from src.utils.kv_client import KVClient
+
+settings = Settings()
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window_seconds: float) -> Tuple[bool, float]:
+        """Records one attempt. Returns (allowed, seconds until the next attempt is allowed)."""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets in process memory.
+
+    Each key holds `limit` tokens refilled evenly over `window_seconds`. At
+    most max_keys buckets are kept; the least recently used one is evicted
+    first, so memory stays bounded under key-spraying.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, last refill)
+        self.evictions = 0
+
+    async def hit(self, key: str, limit: int, window_seconds: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        rate = limit / window_seconds
+        tokens, updated = self._buckets.pop(key, (float(limit), now))
+        tokens = min(float(limit), tokens + (now - updated) * rate)
+
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        self._buckets[key] = (tokens, now)
+
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+        return allowed, 0.0 if allowed else (1.0 - tokens) / rate
+
+
+class KVRateLimitBackend(RateLimitBackend):
+    """
+    Fixed-window counters in a Redis-protocol server, shared by all workers.
+    One INCR per attempt; the first hit of a window sets its expiry.
+    """
+
+    def __init__(self, client: KVClient, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: int, window_seconds: float) -> Tuple[bool, float]:
+        now = time.time()
+        window = int(now // window_seconds)
+        counter_key = f"{self.prefix}{key}:{window}"
+        count = await self.client.execute("INCR", counter_key)
+        if count == 1:
+            await self.client.execute("PEXPIRE", counter_key, int(window_seconds * 1000))
+        if count <= limit:
+            return True, 0.0
+        return False, (window + 1) * window_seconds - now
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class LoginRateLimiter:
+    """Per-IP and per-email login attempt limits, checked before any DB or hash work."""
+
+    def __init__(self, backend: RateLimitBackend, per_ip: int, per_email: int, window_seconds: float):
+        self.backend = backend
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self.window_seconds = window_seconds
+        self.rejected = 0
+
+    async def check(self, client_ip: str, email: str) -> None:
+        checks = (
+            (f"ip:{client_ip}", self.per_ip),
+            (f"email:{email.lower()}", self.per_email),
+        )
+        for key, limit in checks:
+            if limit <= 0:
+                continue
+            allowed, retry_after = await self.backend.hit(key, limit, self.window_seconds)
+            if not allowed:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many login attempts, please retry later",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                )
+
+
+def build_login_rate_limiter(settings: Settings = settings) -> LoginRateLimiter:
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "kv":
+        backend = KVRateLimitBackend(KVClient(settings.SESSION_KV_URL, pool_size=settings.SESSION_KV_POOL_SIZE))
+    else:
+        backend = MemoryRateLimitBackend(settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+    return LoginRateLimiter(
+        backend,
+        per_ip=settings.LOGIN_RATE_LIMIT_PER_IP,
+        per_email=settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+        window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    )
+
+
+login_rate_limiter = build_login_rate_limiter()
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Seconds the replica is behind. An idle primary leaves the last replay
+# timestamp old, so a standby that has replayed everything it received
+# counts as caught up; a server that is not a standby reports 0.
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN pg_last_wal_receive_lsn() IS NULL THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class ReplicaMonitor:
+    """
+    Background task that measures replication lag.
+
+    Replica reads are routed only while `usable` is True: the last check
+    succeeded and the lag was within max_lag_seconds. Until the first check
+    and whenever the replica is unreachable, reads go to the primary.
+    """
+
+    def __init__(self, db_engine: Optional[AsyncEngine], max_lag_seconds: float, interval_seconds: float):
+        self.db_engine = db_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.usable = False
+        self.lag_seconds = 0.0
+        self.checks = 0
+        self.failures = 0
+
+    async def _measure(self) -> float:
+        async with self.db_engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                return 0.0
+            return float((await conn.execute(LAG_QUERY)).scalar() or 0.0)
+
+    async def check_once(self) -> bool:
+        """Measures the lag once and updates `usable`."""
+        if self.db_engine is None:
+            return False
+        was_usable = self.usable
+        try:
+            self.lag_seconds = await asyncio.wait_for(self._measure(), timeout=self.interval_seconds)
+            self.usable = self.lag_seconds <= self.max_lag_seconds
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            self.usable = False
+            logging.warning(f"Replica check failed: {e}")
+        self.checks += 1
+
+        if self.usable != was_usable:
+            if self.usable:
+                logging.info(f"Replica in use (lag {self.lag_seconds:.3f}s)")
+            else:
+                logging.warning(f"Replica out of rotation (lag {self.lag_seconds:.3f}s), reading from primary")
+        return self.usable
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.check_once()
+
+    def start(self) -> None:
+        if self.db_engine is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "usable": int(self.usable),
+            "lag_seconds": self.lag_seconds,
+            "checks": self.checks,
+            "failures": self.failures,
+        }
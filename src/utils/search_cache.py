@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+
+from src.config.settings import Settings
+
+settings = Settings()
+
+
+class SearchCache:
+    """
+    Bounded in-process LRU of recent user search results.
+
+    Autocomplete sends the same short prefixes over and over, so results
+    are kept per (query, limit). Any user write in this worker clears the
+    whole cache; writes made by other workers are bounded by the TTL.
+    A result computed while a write happened is not stored, so a search
+    racing a write cannot bring stale rows back.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Optional[List[dict]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: Hashable, rows: List[dict], generation: int) -> None:
+        """Stores rows computed at `generation`, unless a write happened since."""
+        if not self.enabled or generation != self.generation:
+            return
+        self._entries[key] = (rows, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drops everything; called on any user create, update or delete."""
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+search_cache = SearchCache(settings.USER_SEARCH_CACHE_SIZE, settings.USER_SEARCH_CACHE_TTL_SECONDS)
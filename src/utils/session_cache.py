@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.config.settings import Settings
+from src.schemas.user_schema import AuthPrincipal
+
+settings = Settings()
+
+
+class SessionCache:
+    """
+    Bounded in-process cache of session_id -> AuthPrincipal.
+
+    Entries expire after a fixed TTL, never outlive the session's own
+    expires_at, and the least recently used entry is evicted once the
+    cache is full. Each uvicorn worker keeps its own copy, so the TTL
+    bounds how stale a worker can be after a change made by another one.
+    A principal looked up while a session was invalidated is not stored,
+    so a lookup racing a logout cannot bring the revoked session back.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_user: dict = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, session_id: str) -> Optional[AuthPrincipal]:
+        """Return the cached principal or None on a miss."""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        principal, deadline = entry
+        if deadline <= time.monotonic():
+            self._remove(session_id)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return principal
+
+    def set(self, principal: AuthPrincipal, generation: Optional[int] = None) -> None:
+        """
+        Cache a validated session, capped by the session's expiry. Pass the
+        generation read before the store lookup; if any invalidation
+        happened since, the principal may be revoked and is not cached.
+        """
+        if not self.enabled or (generation is not None and generation != self.generation):
+            return
+
+        session_id = principal.session_id
+        expires_at = principal.expires_at
+
+        now = time.monotonic()
+        deadline = now + self.ttl_seconds
+        if expires_at is not None:
+            remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+            if remaining <= 0:
+                return
+            deadline = min(deadline, now + remaining)
+
+        if session_id in self._entries:
+            self._remove(session_id)
+
+        self._entries[session_id] = (principal, deadline)
+        self._by_user.setdefault(principal.email, set()).add(session_id)
+
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a single session, e.g. on logout."""
+        self.generation += 1
+        self._remove(session_id)
+
+    def invalidate_user(self, user_mail: str) -> None:
+        """Drop every cached session belonging to a user."""
+        self.generation += 1
+        for session_id in list(self._by_user.get(user_mail, ())):
+            self._remove(session_id)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._by_user.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        user_mail = entry[0].email
+        sessions = self._by_user.get(user_mail)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._by_user[user_mail]
+
+
+session_cache = SessionCache(
+    max_size=settings.SESSION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,114 @@
+"""
+Optional monthly RANGE partitioning of the sessions table on expires_at.
+
+With SESSION_PARTITIONING enabled the table is created as a partitioned
+table by `python -m src.utils.migrate`, partitions are kept far enough ahead
+to hold a session created today (SESSION_TTL_SECONDS) plus a month's margin
+for the reaper, which tops them up, and partitions whose whole range has expired are dropped instead
+of being deleted row by row.
+"""
+import logging
+import math
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.config.settings import Settings
+
+settings = Settings()
+
+PARTITION_PREFIX = "sessions_p"
+
+CREATE_PARTITIONED_SESSIONS = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id SERIAL NOT NULL,
+    user_mail VARCHAR(100) NOT NULL REFERENCES users (email) ON DELETE CASCADE,
+    session_id VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (id, expires_at),
+    UNIQUE (session_id, expires_at)
+) PARTITION BY RANGE (expires_at)
+"""
+
+
+def _month_start(year: int, month: int) -> datetime:
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+NOT_PARTITIONED_MESSAGE = (
+    "SESSION_PARTITIONING is enabled but sessions is a regular table, which cannot be "
+    "partitioned in place. Either set SESSION_PARTITIONING=false, or drop the table "
+    "(DROP TABLE sessions; every user has to log in again) and rerun `python -m src.utils.migrate`."
+)
+
+
+async def sessions_partitioned(conn: AsyncConnection) -> Optional[bool]:
+    """Whether sessions is a partitioned table; None if it does not exist yet."""
+    result = await conn.execute(text(
+        "SELECT to_regclass('sessions') IS NOT NULL, "
+        "EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('sessions'))"
+    ))
+    exists, partitioned = result.one()
+    return bool(partitioned) if exists else None
+
+
+async def create_partitioned_sessions_table(conn: AsyncConnection) -> None:
+    if await sessions_partitioned(conn) is False:
+        raise RuntimeError(NOT_PARTITIONED_MESSAGE)
+    await conn.execute(text(CREATE_PARTITIONED_SESSIONS))
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sessions_session_id ON sessions (session_id)"))
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_sessions_user_mail_created_at ON sessions (user_mail, created_at)"
+    ))
+
+
+def months_ahead_for_ttl(ttl_seconds: int) -> int:
+    """Months of partitions needed past this one: the TTL, rounded up, plus one spare."""
+    return max(2, math.ceil(ttl_seconds / (28 * 24 * 3600)) + 1)
+
+
+async def ensure_session_partitions(conn: AsyncConnection, months_ahead: Optional[int] = None) -> None:
+    """
+    Creates the partitions for this month and the next months_ahead months
+    (by default enough for SESSION_TTL_SECONDS, see months_ahead_for_ttl).
+    """
+    if months_ahead is None:
+        months_ahead = months_ahead_for_ttl(settings.SESSION_TTL_SECONDS)
+    now = datetime.now(timezone.utc)
+    for offset in range(months_ahead + 1):
+        start = _month_start(now.year, now.month + offset)
+        end = _month_start(start.year, start.month + 1)
+        name = f"{PARTITION_PREFIX}{start:%Y%m}"
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF sessions "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+
+async def drop_expired_session_partitions(conn: AsyncConnection) -> List[str]:
+    """Drops partitions whose whole month is in the past. Returns their names."""
+    result = await conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'sessions'"
+    ))
+    now = datetime.now(timezone.utc)
+    dropped = []
+    for name in result.scalars():
+        if not name.startswith(PARTITION_PREFIX):
+            continue
+        try:
+            start = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m").replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        if _month_start(start.year, start.month + 1) <= now:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    if dropped:
+        logging.info(f"Dropped expired session partitions: {', '.join(dropped)}")
+    return dropped
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+
+from src.config.database import AsyncSessionLocal
+from src.config.settings import Settings
+from src.models.user import Session
+from src.utils.session_partitions import (
+    NOT_PARTITIONED_MESSAGE, drop_expired_session_partitions, ensure_session_partitions, sessions_partitioned,
+)
+
+settings = Settings()
+
+
+class SessionReaper:
+    """
+    Background task that deletes expired sessions in bounded batches.
+
+    Each batch is its own short transaction and skips rows locked by another
+    worker's reaper, so running one reaper per worker is safe. With
+    SESSION_PARTITIONING enabled, whole expired partitions are dropped first.
+    """
+
+    def __init__(self, interval_seconds: float, batch_size: int, max_batches: int, partitioned: bool = False):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.partitioned = partitioned
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.rows_reaped_total = 0
+        self.partitions_dropped_total = 0
+        self.last_run_rows = 0
+        self.last_run_seconds = 0.0
+
+    async def reap_once(self) -> int:
+        """Runs one reaping pass and returns the number of rows deleted."""
+        start = time.perf_counter()
+        reaped = 0
+
+        if self.partitioned:
+            async with AsyncSessionLocal() as db:
+                conn = await db.connection()
+                if await sessions_partitioned(conn):
+                    await ensure_session_partitions(conn)
+                    self.partitions_dropped_total += len(await drop_expired_session_partitions(conn))
+                    await db.commit()
+                else:
+                    # Not migrated yet: fall back to deleting rows rather than failing every run
+                    logging.warning(f"Session reaper deleting rows instead: {NOT_PARTITIONED_MESSAGE}")
+                    self.partitioned = False
+
+        expired_ids = (
+            select(Session.id)
+            .where(Session.expires_at < func.now())
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = delete(Session).where(Session.id.in_(expired_ids)).execution_options(synchronize_session=False)
+
+        for _ in range(self.max_batches):
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(stmt)
+                await db.commit()
+            reaped += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+
+        self.runs += 1
+        self.rows_reaped_total += reaped
+        self.last_run_rows = reaped
+        self.last_run_seconds = time.perf_counter() - start
+        if reaped:
+            logging.info(f"Session reaper deleted {reaped} expired sessions in {self.last_run_seconds:.3f}s")
+        return reaped
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reap_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Session reaper run failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="session-reaper")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "rows_reaped_total": self.rows_reaped_total,
+            "partitions_dropped_total": self.partitions_dropped_total,
+            "last_run_rows": self.last_run_rows,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+session_reaper = SessionReaper(
+    interval_seconds=settings.SESSION_REAPER_INTERVAL_SECONDS,
+    batch_size=settings.SESSION_REAPER_BATCH_SIZE,
+    max_batches=settings.SESSION_REAPER_MAX_BATCHES,
+    partitioned=settings.SESSION_PARTITIONING,
+)
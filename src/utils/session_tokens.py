@@ -0,0 +1,159 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from src.schemas.user_schema import AuthPrincipal, UserRole
+from src.utils.kv_client import KVClient
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def parse_token_keys(raw: Optional[str]) -> Dict[str, bytes]:
+    """Parses "kid:secret,kid:secret" (first entry signs, all verify)."""
+    keys = {}
+    for item in (raw or "").split(","):
+        if not item.strip():
+            continue
+        kid, _, secret = item.strip().partition(":")
+        if not kid or not secret:
+            raise ValueError("SESSION_TOKEN_KEYS entries must look like kid:secret")
+        keys[kid] = secret.encode()
+    return keys
+
+
+class TokenSigner:
+    """
+    Compact HMAC-SHA256 signed session tokens: "<kid>.<payload>.<signature>".
+
+    The payload carries the user id, email, username, role, expiry, issue
+    time and a unique token id. The issue time is in microseconds, so that a
+    token issued right after a revocation cutoff (a new login following a
+    password change) is told apart from the tokens the cutoff covers. New tokens are signed with the first key;
+    any listed key still verifies, so keys can be rotated without logging
+    everybody out.
+    """
+
+    def __init__(self, keys: Dict[str, bytes]):
+        if not keys:
+            raise ValueError("SESSION_TOKEN_KEYS must define at least one signing key")
+        self.keys = keys
+        self.active_kid = next(iter(keys))
+
+    def _sign(self, kid: str, body: str) -> str:
+        return _b64encode(hmac.new(self.keys[kid], f"{kid}.{body}".encode(), hashlib.sha256).digest())
+
+    def issue(self, user_id: int, username: str, email: str, role: UserRole, ttl_seconds: int) -> AuthPrincipal:
+        now = time.time_ns() // 1000
+        payload = {
+            "uid": user_id,
+            "sub": email,
+            "name": username,
+            "role": role.value,
+            "iat": now,
+            "exp": now // 1_000_000 + ttl_seconds,
+            "jti": uuid.uuid4().hex,
+        }
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        token = f"{self.active_kid}.{body}.{self._sign(self.active_kid, body)}"
+        return AuthPrincipal(
+            user_id=user_id,
+            username=username,
+            email=email,
+            role=role,
+            session_id=token,
+            expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc),
+        )
+
+    def decode(self, token: str) -> Optional[Tuple[AuthPrincipal, dict]]:
+        """Returns (principal, claims) for a validly signed, unexpired token."""
+        try:
+            kid, body, signature = token.split(".")
+        except ValueError:
+            return None
+        if kid not in self.keys or not hmac.compare_digest(signature, self._sign(kid, body)):
+            return None
+        try:
+            claims = json.loads(_b64decode(body))
+            if claims["exp"] <= time.time():
+                return None
+            principal = AuthPrincipal(
+                user_id=claims["uid"],
+                username=claims["name"],
+                email=claims["sub"],
+                role=UserRole(claims["role"]),
+                session_id=token,
+                expires_at=datetime.fromtimestamp(claims["exp"], timezone.utc),
+            )
+        except (ValueError, KeyError, TypeError):
+            return None
+        return principal, claims
+
+
+class MemoryRevocationList:
+    """
+    Revoked token ids plus a per-user "not before" time, in process memory.
+
+    Entries only need to live until the tokens they cover expire. This list
+    is per worker; use the kv variant when running several workers.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._revoked: Dict[str, float] = {}  # jti -> token exp
+        self._not_before: Dict[str, Tuple[int, float]] = {}  # email -> (iat cutoff in µs, entry exp)
+
+    async def is_revoked(self, claims: dict) -> bool:
+        if claims["jti"] in self._revoked:
+            return True
+        cutoff = self._not_before.get(claims["sub"])
+        return cutoff is not None and claims["iat"] <= cutoff[0]
+
+    async def revoke(self, claims: dict) -> None:
+        self._purge()
+        self._revoked[claims["jti"]] = claims["exp"]
+
+    async def revoke_user(self, email: str) -> None:
+        self._purge()
+        self._not_before[email] = (time.time_ns() // 1000, time.time() + self.ttl_seconds)
+
+    def _purge(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[jti]
+        for email in [email for email, (_, exp) in self._not_before.items() if exp <= now]:
+            del self._not_before[email]
+
+
+class KVRevocationList:
+    """The same revocation list kept in a Redis-protocol server, shared by all workers."""
+
+    def __init__(self, client: KVClient, ttl_seconds: int, prefix: str = "revoked:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def is_revoked(self, claims: dict) -> bool:
+        if await self.client.get(self.prefix + claims["jti"]) is not None:
+            return True
+        cutoff = await self.client.get(self.prefix + "user:" + claims["sub"])
+        return cutoff is not None and claims["iat"] <= int(cutoff)
+
+    async def revoke(self, claims: dict) -> None:
+        remaining_ms = max(int((claims["exp"] - time.time()) * 1000), 1)
+        await self.client.execute("SET", self.prefix + claims["jti"], "1", "PX", remaining_ms)
+
+    async def revoke_user(self, email: str) -> None:
+        await self.client.execute(
+            "SET", self.prefix + "user:" + email, time.time_ns() // 1000, "EX", self.ttl_seconds
+        )